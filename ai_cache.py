@@ -0,0 +1,156 @@
+import os
+import threading
+from collections import OrderedDict
+
+import requests
+
+from binance_governor import Singleflight
+from chart_cache import last_closed_open_time
+
+# === Konfigurasi analisa AI ===
+# Base URL bisa diarahkan ke server lokal (stand-in endpoint chat completions) untuk pengujian
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1").rstrip("/")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "30"))
+# Maksimal completion berjalan bersamaan, dan berapa lama permintaan lain boleh menunggu slot
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "4"))
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "10"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "512"))
+# Analisa berlaku sampai candle interval ini berikutnya close
+AI_CACHE_INTERVAL = os.getenv("AI_CACHE_INTERVAL", "5m")
+# Confidence dibulatkan ke kelipatan 1/AI_CONFIDENCE_BUCKETS
+AI_CONFIDENCE_BUCKETS = int(os.getenv("AI_CONFIDENCE_BUCKETS", "4"))
+
+_session = requests.Session()
+
+
+class AIBusy(Exception):
+    pass
+
+
+def chat_completion(prompt, max_tokens=300, temperature=0.5, timeout=AI_TIMEOUT):
+    res = _session.post(
+        f"{OPENAI_API_BASE}/chat/completions",
+        headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+        json={
+            "model": OPENAI_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        },
+        timeout=timeout,
+    )
+    res.raise_for_status()
+    return res.json()["choices"][0]["message"]["content"]
+
+
+def ai_key(symbol, signal, confidence, now=None):
+    return (symbol, signal, round(confidence * AI_CONFIDENCE_BUCKETS),
+            last_closed_open_time(AI_CACHE_INTERVAL, now))
+
+
+# === Cache jawaban AI (LRU) ===
+# Key (symbol, sinyal, bucket confidence, open-time candle close terakhir): semua
+# TANYA untuk pair yang sama dalam satu candle memakai satu jawaban model.
+# Permintaan paralel untuk key yang sama digabung ke satu completion, dan jumlah
+# completion yang berjalan dibatasi AI_CONCURRENCY agar thread tidak habis
+# menunggu OpenAI. Jawaban gagal tidak disimpan.
+class AICache:
+    def __init__(self, max_entries=AI_CACHE_MAX_ENTRIES, concurrency=AI_CONCURRENCY, queue_timeout=AI_QUEUE_TIMEOUT):
+        self.max_entries = max_entries
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+        self.errors = 0
+        self.busy = 0
+        self.evictions = 0
+        self.inflight = 0
+        self.flights = Singleflight()
+        self._entries = OrderedDict()
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            reply = self._lookup(key)
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return reply
+
+    def put(self, key, reply):
+        with self._lock:
+            self._entries[key] = reply
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Jawaban dari cache, atau create() (satu per key, maksimal `concurrency` sekaligus)
+    def get_or_create(self, key, create):
+        reply = self.get(key)
+        if reply is not None:
+            return reply
+
+        def call():
+            with self._lock:
+                reply = self._lookup(key)
+            if reply is not None:
+                return reply
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                with self._lock:
+                    self.busy += 1
+                raise AIBusy(f"{self.concurrency} analisa AI sedang berjalan")
+            try:
+                with self._lock:
+                    self.calls += 1
+                    self.inflight += 1
+                reply = create()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    self.inflight -= 1
+                self._slots.release()
+            self.put(key, reply)
+            return reply
+
+        reply, _ = self.flights.do(key, call)
+        return reply
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "coalesced": self.flights.coalesced,
+                "calls": self.calls,
+                "errors": self.errors,
+                "busy": self.busy,
+                "inflight": self.inflight,
+                "concurrency": self.concurrency,
+                "evictions": self.evictions,
+            }
+
+
+ai_cache = AICache()
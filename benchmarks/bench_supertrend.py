@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import ta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chart_generator import calculate_supertrend, calculate_supertrend_batch
+
+# === Benchmark Supertrend: loop .iloc lama vs kernel array ===
+# Jalankan: python benchmarks/bench_supertrend.py [jumlah_simbol_batch]
+
+
+def legacy_supertrend(df, period=10, multiplier=3):
+    # Implementasi sebelumnya (loop Python + .iloc), dipakai sebagai referensi
+    hl2 = (df['high'] + df['low']) / 2
+    atr = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=period).average_true_range()
+    upperband = hl2 + (multiplier * atr)
+    lowerband = hl2 - (multiplier * atr)
+    supertrend = [True] * len(df)
+
+    for i in range(1, len(df)):
+        if df['close'].iloc[i] > upperband.iloc[i - 1]:
+            supertrend[i] = True
+        elif df['close'].iloc[i] < lowerband.iloc[i - 1]:
+            supertrend[i] = False
+        else:
+            supertrend[i] = supertrend[i - 1]
+            if supertrend[i] and lowerband.iloc[i] < lowerband.iloc[i - 1]:
+                lowerband.iloc[i] = lowerband.iloc[i - 1]
+            if not supertrend[i] and upperband.iloc[i] > upperband.iloc[i - 1]:
+                upperband.iloc[i] = upperband.iloc[i - 1]
+
+    return pd.DataFrame({'supertrend': supertrend, 'upperband': upperband, 'lowerband': lowerband}, index=df.index)
+
+
+def random_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.001, n)) * close
+    index = pd.date_range("2024-01-01", periods=n, freq="1min", name="timestamp")
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.uniform(1, 100, n),
+    }, index=index)
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'bars':>7} {'legacy':>10} {'array':>10} {'speedup':>8}  identik")
+    for n in (500, 5_000, 50_000):
+        df = random_ohlcv(n)
+        t_old, old = timed(legacy_supertrend, df, repeat=1 if n > 5_000 else 3)
+        t_new, new = timed(calculate_supertrend, df)
+        same = old.equals(new)
+        print(f"{n:>7} {t_old * 1000:>8.1f}ms {t_new * 1000:>8.2f}ms {t_old / t_new:>7.0f}x  {same}")
+
+    frames = {f"SYM{k}": random_ohlcv(500, seed=k) for k in range(batch)}
+    t_loop, _ = timed(lambda: {s: calculate_supertrend(df) for s, df in frames.items()})
+    t_batch, result = timed(calculate_supertrend_batch, frames)
+    same = all(result[s].equals(legacy_supertrend(frames[s])) for s in list(frames)[:5])
+    print(f"batch {batch} simbol x 500 bar: per-simbol {t_loop * 1000:.1f}ms, batch {t_batch * 1000:.1f}ms, identik {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import threading
+
+# === Cek cache analisa AI terhadap endpoint chat completions stand-in ===
+# Tanpa jaringan/OpenAI: OPENAI_API_BASE diarahkan ke server lokal (benchmarks/standin.py).
+# Jalankan: python benchmarks/check_ai_cache.py   (exit code 1 bila ada cek yang gagal)
+#   - TANYA kedua untuk key yang sama dilayani dari cache
+#   - permintaan identik yang bersamaan digabung ke satu completion
+#   - completion berjalan dibatasi `concurrency`, sisanya AIBusy setelah queue_timeout
+#   - jawaban gagal tidak disimpan
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from standin import StandIn, Checks
+
+standin = StandIn().start()
+os.environ["OPENAI_API_BASE"] = f"{standin.url}/v1"
+os.environ.setdefault("OPENAI_API_KEY", "sk-standin")
+
+import requests
+from ai_cache import AICache, AIBusy, ai_key, chat_completion, AI_CACHE_INTERVAL
+from kline_cache import INTERVAL_MS
+
+COMPLETIONS = "/v1/chat/completions"
+REPLY = {"choices": [{"message": {"role": "assistant", "content": "📊 analisa stand-in"}}]}
+
+checks = Checks()
+
+
+def create():
+    return chat_completion("Analisa BTCUSDT", timeout=10)
+
+
+def parallel(fns):
+    results = [None] * len(fns)
+
+    def run(i):
+        try:
+            results[i] = fns[i]()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(fns))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def check_hits():
+    cache = AICache()
+    standin.route(COMPLETIONS, REPLY)
+    hits = standin.hits[COMPLETIONS]
+    first = cache.get_or_create(("BTCUSDT", "LONG", 3, 0), create)
+    second = cache.get_or_create(("BTCUSDT", "LONG", 3, 0), create)
+    stats = cache.stats()
+    checks.check("key sama dilayani dari cache", standin.hits[COMPLETIONS] - hits == 1 and first == second,
+                 f"{standin.hits[COMPLETIONS] - hits} completion untuk 2 permintaan")
+    checks.check("stats hit/miss", stats["hits"] == 1 and stats["calls"] == 1, f"hits {stats['hits']}, calls {stats['calls']}")
+
+
+def check_collapse():
+    cache = AICache()
+    standin.route(COMPLETIONS, REPLY, delay=0.3)
+    hits = standin.hits[COMPLETIONS]
+    results = parallel([lambda: cache.get_or_create(("ETHUSDT", "SHORT", 2, 0), create)] * 10)
+    checks.check("permintaan identik bersamaan digabung", standin.hits[COMPLETIONS] - hits == 1,
+                 f"{standin.hits[COMPLETIONS] - hits} completion untuk 10 permintaan")
+    checks.check("semua pemanggil menerima jawaban sama", all(r == results[0] and isinstance(r, str) for r in results))
+    checks.check("stats coalesced", cache.stats()["coalesced"] == 9, f"{cache.stats()['coalesced']}")
+
+
+def check_concurrency():
+    cache = AICache(concurrency=2, queue_timeout=0.1)
+    standin.route(COMPLETIONS, REPLY, delay=0.5)
+    hits = standin.hits[COMPLETIONS]
+    keys = [(f"PAIR{i}USDT", "LONG", 3, 0) for i in range(4)]
+    results = parallel([lambda key=key: cache.get_or_create(key, create) for key in keys])
+    busy = sum(isinstance(r, AIBusy) for r in results)
+    checks.check("completion dibatasi concurrency", standin.hits[COMPLETIONS] - hits == 2 and busy == 2,
+                 f"{standin.hits[COMPLETIONS] - hits} completion, {busy} AIBusy dari 4 key berbeda")
+
+
+def check_errors():
+    cache = AICache()
+    key = ("SOLUSDT", "LONG", 3, 0)
+    standin.route(COMPLETIONS, {"error": {"message": "stand-in down"}}, status=500)
+    failed = parallel([lambda: cache.get_or_create(key, create)])[0]
+    standin.route(COMPLETIONS, REPLY)
+    hits = standin.hits[COMPLETIONS]
+    reply = cache.get_or_create(key, create)
+    checks.check("jawaban gagal tidak disimpan",
+                 isinstance(failed, requests.HTTPError) and standin.hits[COMPLETIONS] - hits == 1 and isinstance(reply, str),
+                 f"errors {cache.stats()['errors']}")
+
+
+def check_key():
+    step = INTERVAL_MS[AI_CACHE_INTERVAL] / 1000
+    start = 1_700_000_000 // step * step
+    same = ai_key("BTCUSDT", "LONG", 0.70, now=start + 1) == ai_key("BTCUSDT", "LONG", 0.74, now=start + step - 1)
+    checks.check(f"key sama dalam satu candle {AI_CACHE_INTERVAL} dan bucket confidence", same)
+    checks.check("key berganti di candle berikutnya",
+                 ai_key("BTCUSDT", "LONG", 0.70, now=start + 1) != ai_key("BTCUSDT", "LONG", 0.70, now=start + step + 1))
+    checks.check("key berganti bila bucket confidence beda",
+                 ai_key("BTCUSDT", "LONG", 0.70, now=start + 1) != ai_key("BTCUSDT", "LONG", 0.95, now=start + 1))
+
+
+def main():
+    try:
+        check_hits()
+        check_collapse()
+        check_concurrency()
+        check_errors()
+        check_key()
+    finally:
+        standin.stop()
+    return checks.exit_code()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
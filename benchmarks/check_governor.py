@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import threading
+
+# === Cek governor REST Binance terhadap server stand-in ===
+# Tanpa jaringan: base URL spot/futures diarahkan ke server lokal (benchmarks/standin.py).
+# Jalankan: python benchmarks/check_governor.py   (exit code 1 bila ada cek yang gagal)
+#   - GET identik yang bersamaan dikirim sekali (singleflight)
+#   - token bucket dipangkas ke X-MBX-USED-WEIGHT-1M dari server
+#   - 429/418 menahan semua request market itu selama Retry-After
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from standin import StandIn, Checks
+
+standin = StandIn().start()
+os.environ["BINANCE_SPOT_URL"] = standin.url
+os.environ["BINANCE_FUTURES_URL"] = standin.url
+# Batas kecil agar efek bucket terlihat dalam hitungan detik: 600/menit = 10 weight/detik
+os.environ["BINANCE_SPOT_WEIGHT_LIMIT"] = "600"
+os.environ["BINANCE_FUTURES_WEIGHT_LIMIT"] = "600"
+
+from binance_governor import USED_WEIGHT_HEADER, binance_session, governor
+
+session = binance_session()
+checks = Checks()
+
+
+def get(path, **params):
+    started = time.monotonic()
+    response = session.get(f"{standin.url}{path}", params=params, timeout=10)
+    return response, time.monotonic() - started
+
+
+def parallel(n, fn):
+    results = [None] * n
+
+    def run(i):
+        results[i] = fn()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def check_coalescing():
+    spot = governor("spot")
+    standin.route("/api/v3/klines", [[0, "1", "2", "0.5", "1.5", "10"]], headers={USED_WEIGHT_HEADER: 0}, delay=0.3)
+    before = spot.stats()["coalesced"]
+    responses = parallel(8, lambda: get("/api/v3/klines", symbol="BTCUSDT", interval="1m", limit=10)[0])
+    checks.check("GET identik bersamaan dikirim sekali", standin.hits["/api/v3/klines"] == 1,
+                 f"{standin.hits['/api/v3/klines']} request sampai ke server dari 8 pemanggil")
+    checks.check("pemanggil yang digabung menerima respons sama",
+                 all(r.status_code == 200 and r.json() == responses[0].json() for r in responses))
+    checks.check("stats coalesced", spot.stats()["coalesced"] - before == 7)
+
+    get("/api/v3/klines", symbol="ETHUSDT", interval="1m", limit=10)
+    get("/api/v3/klines", symbol="BTCUSDT", interval="5m", limit=10)
+    checks.check("parameter berbeda tidak digabung", standin.hits["/api/v3/klines"] == 3,
+                 f"{standin.hits['/api/v3/klines']} request")
+
+
+def check_used_weight():
+    spot = governor("spot")
+    # Server melaporkan seluruh kapasitas sudah terpakai (mis. oleh proses lain di IP yang sama)
+    standin.route("/api/v3/ticker/price", {"symbol": "BTCUSDT", "price": "1"},
+                  headers={USED_WEIGHT_HEADER: int(spot.capacity)})
+    get("/api/v3/ticker/price", symbol="BTCUSDT")
+    stats = spot.stats()
+    checks.check("bucket dipangkas ke used weight server", stats["tokens"] < 2 and stats["used_weight"] == int(spot.capacity),
+                 f"tokens {stats['tokens']}, used_weight {stats['used_weight']}")
+
+    standin.route("/api/v3/ticker/price", {"symbol": "BTCUSDT", "price": "1"}, headers={USED_WEIGHT_HEADER: 2})
+    _, elapsed = get("/api/v3/ticker/price", symbol="BTCUSDT")
+    # weight 2 pada 10 weight/detik: ~0.2s menunggu refill
+    checks.check("request berikutnya menunggu refill", elapsed >= 0.15, f"{elapsed:.2f}s")
+
+
+def check_pause(status, counter):
+    futures = governor("futures")
+    path = "/fapi/v1/ticker/price"
+    standin.route(path, {"code": -1003}, status=status, headers={"Retry-After": 1, USED_WEIGHT_HEADER: 10})
+    before = futures.stats()[counter]
+    response, _ = get(path, symbol="BTCUSDT")
+    checks.check(f"{status} diteruskan ke pemanggil", response.status_code == status)
+    checks.check(f"{status} tercatat", futures.stats()[counter] - before == 1)
+
+    standin.route(path, {"symbol": "BTCUSDT", "price": "1"}, headers={USED_WEIGHT_HEADER: 10})
+    hits = standin.hits[path]
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(zip(("response", "elapsed"), get(path, symbol="BTCUSDT"))))
+    waiter.start()
+    time.sleep(0.5)
+    held = standin.hits[path] == hits
+    _, spot_elapsed = get("/api/v3/ticker/price", symbol="BTCUSDT")
+    waiter.join()
+    checks.check(f"request futures ditahan selama Retry-After setelah {status}", held and result["elapsed"] >= 0.9,
+                 f"menunggu {result['elapsed']:.2f}s")
+    checks.check(f"market lain tidak ikut ditahan setelah {status}", spot_elapsed < 0.5, f"spot {spot_elapsed:.2f}s")
+    checks.check(f"traffic jalan lagi setelah Retry-After ({status})", result["response"].status_code == 200)
+
+
+def main():
+    try:
+        check_coalescing()
+        check_used_weight()
+        check_pause(429, "rate_limited")
+        check_pause(418, "banned")
+    finally:
+        standin.stop()
+    print(f"📊 spot {governor('spot').stats()}\n📊 futures {governor('futures').stats()}")
+    return checks.exit_code()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
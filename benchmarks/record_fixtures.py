@@ -0,0 +1,90 @@
+import os
+import sys
+import gzip
+import json
+import time
+import random
+
+import requests
+
+# === Rekam fixture kline/ticker untuk benchmark ===
+# Jalankan: python benchmarks/record_fixtures.py            (rekam dari Binance)
+#           python benchmarks/record_fixtures.py --synthetic (tanpa jaringan, data acak ber-seed)
+# Hasil: benchmarks/fixtures/klines.json.gz dengan format baris persis seperti REST Binance.
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "klines.json.gz")
+SYMBOLS = ["BTCUSDT", "ETHUSDT"]
+INTERVALS = ["1m", "5m", "15m", "1h"]
+# Batas limit per request klines di tiap market
+LIMITS = {"spot": 1000, "futures": 1500}
+ENDPOINTS = {
+    "spot": "https://api.binance.com/api/v3",
+    "futures": "https://fapi.binance.com/fapi/v1",
+}
+INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000}
+
+
+def record():
+    fixtures = {"klines": {}, "ticker": {}, "recorded_at": int(time.time() * 1000), "source": "binance"}
+    session = requests.Session()
+    for market, base in ENDPOINTS.items():
+        for symbol in SYMBOLS:
+            for interval in INTERVALS:
+                rows = session.get(f"{base}/klines", params={"symbol": symbol, "interval": interval, "limit": LIMITS[market]}, timeout=10).json()
+                fixtures["klines"][f"{market}:{symbol}:{interval}"] = rows
+                print(f"✅ {market} {symbol} {interval}: {len(rows)} baris")
+    for symbol in SYMBOLS:
+        fixtures["ticker"][symbol] = session.get(f"{ENDPOINTS['spot']}/ticker/24hr", params={"symbol": symbol}, timeout=10).json()
+    return fixtures
+
+
+def synthetic_rows(seed, interval, start_price, end_ms, limit):
+    rnd = random.Random(seed)
+    step = INTERVAL_MS[interval]
+    vol = 0.002 * (step / 60_000) ** 0.5
+    price = start_price
+    rows = []
+    for i in range(limit):
+        t = end_ms - (limit - 1 - i) * step
+        o = price
+        c = o * (1 + rnd.gauss(0, vol))
+        h = max(o, c) * (1 + abs(rnd.gauss(0, vol / 2)))
+        l = min(o, c) * (1 - abs(rnd.gauss(0, vol / 2)))
+        v = rnd.uniform(10, 1000)
+        rows.append([t, f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.3f}", t + step - 1,
+                     f"{v * c:.2f}", rnd.randint(100, 5000), f"{v / 2:.3f}", f"{v * c / 2:.2f}", "0"])
+        price = c
+    return rows
+
+
+def synthetic():
+    end = 1_700_000_000_000
+    fixtures = {"klines": {}, "ticker": {}, "recorded_at": end, "source": "synthetic"}
+    prices = {"BTCUSDT": 35000.0, "ETHUSDT": 1900.0}
+    for m, market in enumerate(ENDPOINTS):
+        for s, symbol in enumerate(SYMBOLS):
+            for i, interval in enumerate(INTERVALS):
+                step = INTERVAL_MS[interval]
+                rows = synthetic_rows(m * 100 + s * 10 + i, interval, prices[symbol], (end // step) * step, LIMITS[market])
+                fixtures["klines"][f"{market}:{symbol}:{interval}"] = rows
+        for symbol in SYMBOLS:
+            day = fixtures["klines"][f"spot:{symbol}:1h"][-24:]
+            fixtures["ticker"][symbol] = {
+                "symbol": symbol,
+                "highPrice": max((r[2] for r in day), key=float),
+                "lowPrice": min((r[3] for r in day), key=float),
+                "lastPrice": day[-1][4],
+            }
+    return fixtures
+
+
+def main():
+    fixtures = synthetic() if "--synthetic" in sys.argv else record()
+    os.makedirs(os.path.dirname(FIXTURE_PATH), exist_ok=True)
+    with gzip.open(FIXTURE_PATH, "wt") as f:
+        json.dump(fixtures, f, separators=(",", ":"))
+    print(f"💾 Fixture disimpan ke {FIXTURE_PATH} ({os.path.getsize(FIXTURE_PATH) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import io
+import os
+import gzip
+import json
+import time
+import zlib
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import BaseAdapter
+
+from record_fixtures import FIXTURE_PATH, INTERVAL_MS
+
+# === Replay fixture Binance untuk benchmark offline ===
+# Fixture digeser waktunya saat dimuat sehingga baris terakhir tiap seri menjadi
+# candle yang sedang berjalan "sekarang"; cache, store dan scheduler berperilaku
+# seperti saat live. Simbol yang tidak direkam dipetakan (deterministik) ke salah
+# satu simbol yang ada. REPLAY_LATENCY_MS mensimulasikan round-trip jaringan per request
+# (default 0: yang diukur hanya CPU).
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+
+
+def _latency():
+    if REPLAY_LATENCY_MS:
+        time.sleep(REPLAY_LATENCY_MS / 1000)
+
+
+class Fixtures:
+    def __init__(self, path=FIXTURE_PATH):
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+        self.source = data.get("source")
+        self.ticker = data["ticker"]
+        self.series = {}
+        now_ms = int(time.time() * 1000)
+        for key, rows in data["klines"].items():
+            market, symbol, interval = key.split(":")
+            step = INTERVAL_MS[interval]
+            offset = (now_ms // step) * step - rows[-1][0]
+            self.series[key] = [[r[0] + offset] + r[1:6] + [r[6] + offset] + r[7:] for r in rows]
+        self.symbols = sorted({k.split(":")[1] for k in self.series})
+
+    def resolve(self, symbol):
+        symbol = symbol.upper()
+        if symbol in self.symbols:
+            return symbol
+        return self.symbols[zlib.crc32(symbol.encode()) % len(self.symbols)]
+
+    def klines(self, market, symbol, interval, limit=500, start_time=None, end_time=None):
+        rows = self.series.get(f"{market}:{self.resolve(symbol)}:{interval}", [])
+        if end_time is not None:
+            rows = [r for r in rows if r[0] <= int(end_time)]
+        if start_time is not None:
+            rows = [r for r in rows if r[0] >= int(start_time)][:int(limit)]
+        return [list(r) for r in rows[-int(limit):]]
+
+
+_fixtures = None
+
+
+def fixtures():
+    global _fixtures
+    if _fixtures is None:
+        _fixtures = Fixtures()
+    return _fixtures
+
+
+# Pengganti binance.client.Client: tanpa ping/jaringan, data dari fixture
+class ReplayClient:
+    def __init__(self, *args, **kwargs):
+        self.session = None
+        self.response = None
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **kwargs):
+        _latency()
+        return fixtures().klines("spot", symbol, interval, limit, startTime, endTime)
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **kwargs):
+        _latency()
+        return fixtures().klines("futures", symbol, interval, limit, startTime, endTime)
+
+    def get_ticker(self, symbol, **kwargs):
+        _latency()
+        return dict(fixtures().ticker[fixtures().resolve(symbol)])
+
+    def ping(self):
+        return {}
+
+
+# Adapter requests untuk modul yang memanggil REST Binance langsung (webhookai)
+class ReplayAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        market = "futures" if url.path.startswith("/fapi") else "spot"
+        _latency()
+        if url.path.endswith("/klines"):
+            body = fixtures().klines(market, params["symbol"], params["interval"], params.get("limit", 500),
+                                     params.get("startTime"), params.get("endTime"))
+        elif url.path.endswith("/ticker/24hr"):
+            body = [dict(t, quoteVolume="1000000") for t in fixtures().ticker.values()]
+        else:
+            raise requests.ConnectionError(f"Endpoint tidak ada di fixture: {url.path}")
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.raw = io.BytesIO(json.dumps(body).encode())
+        return response
+
+    def close(self):
+        pass
+
+
+def install():
+    # Harus dipanggil sebelum modul bot di-import (mereka membuat Client saat import)
+    import binance.client
+    binance.client.Client = ReplayClient
+
+
+def mount(session):
+    adapter = ReplayAdapter()
+    for prefix in ("https://api.binance.com", "https://fapi.binance.com"):
+        session.mount(prefix, adapter)
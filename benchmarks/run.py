@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+# === Suite benchmark offline ===
+# Waktu = tercepat dari BENCH_REPEAT pengulangan (paling tahan noise), memori = peak tracemalloc.
+# Jalankan: python benchmarks/run.py [--warm] [--save] [--only NAMA]
+#   --warm  cache kline/chart/indikator tidak dikosongkan antar pengulangan
+#   --save  simpan hasil sebagai baseline baru (benchmarks/baseline.json)
+# Semua data dari fixture (benchmarks/fixtures); exit code 1 bila ada regresi
+# waktu atau memori di atas BENCH_TOLERANCE dibanding baseline.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+BENCH_REPEAT = int(os.getenv("BENCH_REPEAT", "5"))
+BENCH_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.25"))
+BENCH_MIN_DELTA_MS = 5.0
+
+# Lingkungan hermetis: token dummy, store kline di direktori sementara
+STORE_DIR = tempfile.mkdtemp(prefix="bench-klines-")
+os.environ["KLINE_STORE_DIR"] = STORE_DIR
+for name in ("TELEGRAM_BOT_TOKEN", "TELEGRAM_TOKEN", "BOT_TOKEN"):
+    os.environ.setdefault(name, "123456:benchmark")
+os.environ.pop("STREAM_SYMBOLS", None)
+
+import replay
+replay.install()
+
+import matplotlib
+matplotlib.use("Agg")
+
+import webhook
+import chart_generator
+import worker_bot
+import webhookai
+import indicator_state
+import kline_store
+from kline_cache import kline_cache
+from chart_cache import chart_cache
+
+replay.mount(webhookai.binance_session)
+
+
+def reset_state():
+    kline_cache.clear()
+    chart_cache.clear()
+    with indicator_state._states_lock:
+        indicator_state._states.clear()
+    with kline_store._stores_lock:
+        kline_store._stores.clear()
+    shutil.rmtree(STORE_DIR, ignore_errors=True)
+
+
+def supertrend_input():
+    rows = replay.fixtures().klines("spot", "BTCUSDT", "1m", 1000)
+    return webhook.OHLCVWindow.from_klines(rows).to_frame()
+
+
+# (nama, fungsi, jumlah pengulangan); fungsi menerima hasil setup (atau None)
+CASES = [
+    ("webhook.analyze_multi_timeframe", lambda _: webhook.analyze_multi_timeframe("BTCUSDT"), None, BENCH_REPEAT),
+    ("webhook.backtest_strategy", lambda _: webhook.backtest_strategy("BTCUSDT", "1m", 500), None, BENCH_REPEAT),
+    ("webhook.backtest_all_symbols", lambda _: webhook.backtest_all_symbols(webhook.POPULAR_SYMBOLS, "1m", 500), None, BENCH_REPEAT),
+    ("chart_generator.draw_chart_by_timeframe[fast]", lambda _: chart_generator.draw_chart_by_timeframe("BTCUSDT", "1h", fast=True), None, BENCH_REPEAT),
+    ("chart_generator.draw_chart_by_timeframe[legacy]", lambda _: chart_generator.draw_chart_by_timeframe("BTCUSDT", "1h", fast=False), None, 2),
+    ("chart_generator.calculate_supertrend", lambda df: chart_generator.calculate_supertrend(df), supertrend_input, BENCH_REPEAT),
+    ("worker_bot.analyze_signal", lambda _: worker_bot.analyze_signal("BTCUSDT"), None, BENCH_REPEAT),
+    ("webhookai.analyze_signal", lambda _: webhookai.analyze_signal("BTCUSDT"), None, BENCH_REPEAT),
+]
+
+
+def measure(func, setup, repeat, warm):
+    arg = setup() if setup else None
+    if warm:
+        reset_state()
+        func(arg)
+    times = []
+    for _ in range(repeat):
+        if not warm:
+            reset_state()
+        started = time.perf_counter()
+        func(arg)
+        times.append((time.perf_counter() - started) * 1000)
+
+    # Peak memori diukur terpisah (tracemalloc memperlambat eksekusi)
+    if not warm:
+        reset_state()
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_ms": round(min(times), 2), "peak_kb": round(peak / 1024, 1)}
+
+
+def compare(current, base):
+    # Return (teks delta waktu, teks delta memori, regresi?)
+    if not base:
+        return "baru", "baru", False
+    dt = current["time_ms"] - base["time_ms"]
+    rt = dt / base["time_ms"] if base["time_ms"] else 0.0
+    rm = (current["peak_kb"] - base["peak_kb"]) / base["peak_kb"] if base["peak_kb"] else 0.0
+    slow = rt > BENCH_TOLERANCE and dt > BENCH_MIN_DELTA_MS
+    heavy = rm > BENCH_TOLERANCE
+    return f"{rt * 100:+.0f}%", f"{rm * 100:+.0f}%", slow or heavy
+
+
+def main():
+    warm = "--warm" in sys.argv
+    only = sys.argv[sys.argv.index("--only") + 1] if "--only" in sys.argv else None
+    mode = "warm" if warm else "cold"
+    try:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+
+    print(f"🧪 Benchmark ({mode}, fixture {replay.fixtures().source}, best of {BENCH_REPEAT})")
+    print(f"{'kasus':<50} {'waktu':>10} {'base':>10} {'Δ':>6} {'peak':>10} {'base':>10} {'Δ':>6}")
+    results, regressions = {}, []
+    for name, func, setup, repeat in CASES:
+        if only and only not in name:
+            continue
+        current = measure(func, setup, repeat, warm)
+        results[name] = current
+        base = baseline.get(mode, {}).get(name)
+        d_time, d_mem, regressed = compare(current, base)
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<50} {current['time_ms']:>8.1f}ms {base['time_ms'] if base else '-':>8}{'ms' if base else '  '} {d_time:>6} "
+            f"{current['peak_kb']:>8.0f}KB {base['peak_kb'] if base else '-':>8}{'KB' if base else '  '} {d_mem:>6}"
+            + ("  ⚠️ REGRESI" if regressed else "")
+        )
+
+    shutil.rmtree(STORE_DIR, ignore_errors=True)
+    if "--save" in sys.argv:
+        baseline.setdefault(mode, {}).update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline {mode} disimpan ke {BASELINE_PATH}")
+    if regressions:
+        print(f"❌ {len(regressions)} regresi: {', '.join(regressions)}")
+        sys.exit(1)
+    print("✅ Tidak ada regresi")
+
+
+if __name__ == "__main__":
+    main()
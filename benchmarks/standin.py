@@ -0,0 +1,80 @@
+import json
+import time
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+
+# === Server stand-in lokal untuk cek governor / cache AI ===
+# Satu ThreadingHTTPServer di 127.0.0.1 (port acak). Respons per path diatur lewat
+# `route(path, body, status, headers, delay)`; path tanpa rute dijawab 404.
+# `hits` menghitung request yang benar-benar sampai ke server per path.
+class StandIn:
+    def __init__(self):
+        self.routes = {}
+        self.hits = Counter()
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self):
+                path = urlparse(self.path).path
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with standin._lock:
+                    standin.hits[path] += 1
+                    route = standin.routes.get(path)
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, status, headers, delay = route
+                if delay:
+                    time.sleep(delay)
+                data = json.dumps(body() if callable(body) else body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, str(value))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def route(self, path, body, status=200, headers=None, delay=0.0):
+        with self._lock:
+            self.routes[path] = (body, status, dict(headers or {}), delay)
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="standin", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Hasil cek: dicetak satu baris per cek, exit code 1 bila ada yang gagal
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def check(self, name, ok, detail=""):
+        print(f"{'✅' if ok else '❌'} {name}" + (f" ({detail})" if detail else ""))
+        if not ok:
+            self.failed += 1
+
+    def exit_code(self):
+        return 1 if self.failed else 0
@@ -0,0 +1,248 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# === Konfigurasi governor REST Binance ===
+# Base URL bisa diarahkan ke server lokal (stand-in) untuk pengujian
+BINANCE_SPOT_URL = os.getenv("BINANCE_SPOT_URL", "https://api.binance.com").rstrip("/")
+BINANCE_FUTURES_URL = os.getenv("BINANCE_FUTURES_URL", "https://fapi.binance.com").rstrip("/")
+# Batas request weight per menit per IP (spot 6000, USD-M futures 2400)
+BINANCE_SPOT_WEIGHT_LIMIT = int(os.getenv("BINANCE_SPOT_WEIGHT_LIMIT", "6000"))
+BINANCE_FUTURES_WEIGHT_LIMIT = int(os.getenv("BINANCE_FUTURES_WEIGHT_LIMIT", "2400"))
+# Porsi batas yang boleh dipakai bot; sisanya cadangan untuk proses lain di IP yang sama
+BINANCE_WEIGHT_HEADROOM = float(os.getenv("BINANCE_WEIGHT_HEADROOM", "0.8"))
+BINANCE_POOL_SIZE = int(os.getenv("BINANCE_POOL_SIZE", "16"))
+# Ping saat membuat Client (perilaku bawaan python-binance) menahan start proses satu
+# round-trip; default dimatikan, koneksi tetap teruji di request pertama
+BINANCE_STARTUP_PING = os.getenv("BINANCE_STARTUP_PING", "0") == "1"
+
+USED_WEIGHT_HEADER = "X-MBX-USED-WEIGHT-1M"
+
+
+def _futures_klines_weight(params):
+    limit = int(params.get("limit", 500))
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+# Weight per endpoint sesuai dokumentasi Binance; endpoint lain dihitung 1
+WEIGHTS = {
+    "/api/v3/klines": 2,
+    "/api/v3/ticker/24hr": lambda p: 2 if "symbol" in p else 80,
+    "/api/v3/ticker/price": lambda p: 2 if "symbol" in p else 4,
+    "/api/v3/exchangeInfo": 20,
+    "/api/v3/depth": lambda p: 5 if int(p.get("limit", 100)) <= 100 else 25,
+    "/fapi/v1/klines": _futures_klines_weight,
+    "/fapi/v1/continuousKlines": _futures_klines_weight,
+    "/fapi/v1/ticker/24hr": lambda p: 1 if "symbol" in p else 40,
+    "/fapi/v1/ticker/price": lambda p: 1 if "symbol" in p else 2,
+    "/fapi/v1/exchangeInfo": 1,
+}
+
+
+def request_weight(path, params):
+    weight = WEIGHTS.get(path, 1)
+    return weight(params) if callable(weight) else weight
+
+
+def market_of(path):
+    return "futures" if path.startswith("/fapi") else "spot"
+
+
+# === Singleflight ===
+# Request identik yang sedang berjalan digabung: pemanggil pertama yang mengirim,
+# pemanggil lain menunggu Future-nya dan menerima hasil yang sama.
+class Singleflight:
+    def __init__(self):
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return fut.result(), False
+        try:
+            result = fn()
+            fut.set_result(result)
+            return result, True
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+
+# === Token bucket weight per market ===
+# Kapasitas = batas per menit x headroom, diisi ulang rata sepanjang menit.
+# Setiap respons membawa weight terpakai versi server (X-MBX-USED-WEIGHT-1M);
+# sisa token dipangkas ke nilai itu sehingga request dari proses lain di IP yang
+# sama ikut terhitung. Respons 429/418 menghentikan semua request sampai
+# Retry-After lewat. GET identik yang sedang berjalan digabung lewat `flights`.
+class WeightGovernor:
+    def __init__(self, limit, headroom=BINANCE_WEIGHT_HEADROOM):
+        self.limit = limit
+        self.capacity = limit * headroom
+        self.rate = limit / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.used_weight = 0
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rate_limited = 0
+        self.banned = 0
+        self.flights = Singleflight()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight):
+        weight = min(weight, self.capacity)
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= weight:
+                    self.tokens -= weight
+                    self.requests += 1
+                    waited = now - started
+                    if waited > 0.001:
+                        self.waits += 1
+                        self.wait_seconds += waited
+                    return waited
+                delay = max(self.paused_until - now, (weight - self.tokens) / self.rate)
+            time.sleep(min(delay, 1.0))
+
+    def observe(self, response):
+        used = response.headers.get(USED_WEIGHT_HEADER)
+        with self._lock:
+            if used is not None and used.isdigit():
+                self.used_weight = int(used)
+                self._refill(time.monotonic())
+                self.tokens = min(self.tokens, self.capacity - self.used_weight)
+            if response.status_code in (418, 429):
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else 60.0
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                self.tokens = min(self.tokens, 0.0)
+                if response.status_code == 418:
+                    self.banned += 1
+                else:
+                    self.rate_limited += 1
+                print(f"⛔ Binance {response.status_code} (weight {used}), semua request ditahan {delay:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "limit": self.limit,
+                "tokens": round(self.tokens, 1),
+                "used_weight": self.used_weight,
+                "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 1),
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "rate_limited": self.rate_limited,
+                "banned": self.banned,
+                "coalesced": self.flights.coalesced,
+            }
+
+
+_governors = {
+    "spot": WeightGovernor(BINANCE_SPOT_WEIGHT_LIMIT),
+    "futures": WeightGovernor(BINANCE_FUTURES_WEIGHT_LIMIT),
+}
+
+
+def governor(market="spot"):
+    return _governors[market]
+
+
+def _clone(response, request):
+    # Salinan respons untuk pemanggil yang digabung (body sudah dibaca penuh oleh leader)
+    clone = requests.Response()
+    clone.status_code = response.status_code
+    clone.headers = CaseInsensitiveDict(response.headers)
+    clone._content = response.content
+    clone._content_consumed = True
+    clone.encoding = response.encoding
+    clone.reason = response.reason
+    clone.url = response.url
+    clone.elapsed = response.elapsed
+    clone.request = request
+    return clone
+
+
+# === Adapter requests ===
+# Dipasang di session mana pun yang bicara ke REST Binance (python-binance Client
+# maupun requests.Session biasa). Setiap request menunggu token sesuai weight
+# endpoint, GET identik yang sedang berjalan digabung, dan header respons
+# memperbarui token bucket.
+class GovernedAdapter(HTTPAdapter):
+    def __init__(self, pool_maxsize=BINANCE_POOL_SIZE, **kwargs):
+        super().__init__(pool_maxsize=pool_maxsize, **kwargs)
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        gov = governor(market_of(url.path))
+
+        def call():
+            gov.acquire(request_weight(url.path, params))
+            response = super(GovernedAdapter, self).send(request, **kwargs)
+            response.content   # baca body sekarang agar bisa dibagi ke pemanggil lain
+            gov.observe(response)
+            return response
+
+        if request.method != "GET" or kwargs.get("stream"):
+            return call()
+        key = (request.url, request.headers.get("X-MBX-APIKEY"))
+        response, leader = gov.flights.do(key, call)
+        return response if leader else _clone(response, request)
+
+
+def mount(session):
+    adapter = GovernedAdapter()
+    for base in {BINANCE_SPOT_URL, BINANCE_FUTURES_URL}:
+        session.mount(base, adapter)
+    return session
+
+
+def binance_session():
+    return mount(requests.Session())
+
+
+def binance_client(api_key=None, api_secret=None, ping=BINANCE_STARTUP_PING):
+    # python-binance Client yang request REST-nya lewat governor dan base URL di atas
+    import binance.client
+    client = binance.client.Client(api_key, api_secret, ping=False)
+    if getattr(client, "session", None) is not None:
+        client.API_URL = f"{BINANCE_SPOT_URL}/api"
+        client.FUTURES_URL = f"{BINANCE_FUTURES_URL}/fapi"
+        mount(client.session)
+    if ping:
+        client.ping()
+    return client
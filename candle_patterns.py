@@ -0,0 +1,98 @@
+import numpy as np
+
+# === Bit pola candle ===
+# Satu uint8 per bar. Bit di bar i berarti pola selesai di bar i: pola satu/dua candle
+# (hammer, inverted hammer, shooting star, engulfing) ada di bar i-1 (dan i-2) dan
+# dikonfirmasi candle i; morning/evening star memakai candle i-2..i; doji adalah candle i.
+HAMMER = 1 << 0
+INVERTED_HAMMER = 1 << 1
+SHOOTING_STAR = 1 << 2
+BULLISH_ENGULFING = 1 << 3
+BEARISH_ENGULFING = 1 << 4
+DOJI = 1 << 5
+MORNING_STAR = 1 << 6
+EVENING_STAR = 1 << 7
+
+# Urutan prioritas (sama dengan detect_reversal_candle untuk lima pola pertama)
+PATTERN_NAMES = [
+    (HAMMER, "Hammer"),
+    (INVERTED_HAMMER, "InvertedHammer"),
+    (BULLISH_ENGULFING, "BullishEngulfing"),
+    (SHOOTING_STAR, "ShootingStar"),
+    (BEARISH_ENGULFING, "BearishEngulfing"),
+    (MORNING_STAR, "MorningStar"),
+    (EVENING_STAR, "EveningStar"),
+    (DOJI, "Doji"),
+]
+
+BULLISH_PATTERNS = HAMMER | INVERTED_HAMMER | BULLISH_ENGULFING | MORNING_STAR
+BEARISH_PATTERNS = SHOOTING_STAR | BEARISH_ENGULFING | EVENING_STAR
+
+# Pola pemicu strategi reversal, dicek terhadap reversal_pattern() (satu pola per bar
+# menurut prioritas, seperti detect_reversal_candle dulu). Aturan lama mencocokkan nama
+# "Engulfing" untuk kedua arah, jadi engulfing bullish maupun bearish ikut memicu LONG
+# dan SHORT; dipertahankan agar sinyal dan hasil backtest tidak berubah.
+REVERSAL_PATTERNS = [bit for bit, _ in PATTERN_NAMES[:5]]
+LONG_PATTERNS = HAMMER | INVERTED_HAMMER | BULLISH_ENGULFING | BEARISH_ENGULFING
+SHORT_PATTERNS = SHOOTING_STAR | BULLISH_ENGULFING | BEARISH_ENGULFING
+
+SMALL_BODY = 0.3     # body / range candle kecil (hammer, star)
+DOJI_BODY = 0.1      # body / range doji
+LONG_BODY = 0.5      # body / range candle pertama morning/evening star
+
+
+# === Scanner ===
+# Semua pola untuk semua bar dalam satu pass array (tanpa loop per bar).
+def scan(o, h, l, c):
+    o, h, l, c = (np.asarray(a, dtype=np.float64) for a in (o, h, l, c))
+    n = len(c)
+    mask = np.zeros(n, dtype=np.uint8)
+    if n == 0:
+        return mask
+
+    body = np.abs(c - o)
+    upper = h - np.maximum(c, o)
+    lower = np.minimum(c, o) - l
+    ratio = body / (h - l + 1e-6)
+    bull = c > o
+    bear = c < o
+
+    mask[(ratio < DOJI_BODY) & (h > l)] |= DOJI
+    if n < 3:
+        return mask
+
+    o1, c1, bull1, bear1, ratio1 = o[:-2], c[:-2], bull[:-2], bear[:-2], ratio[:-2]
+    o2, c2, bull2, bear2 = o[1:-1], c[1:-1], bull[1:-1], bear[1:-1]
+    body2, upper2, lower2, ratio2 = body[1:-1], upper[1:-1], lower[1:-1], ratio[1:-1]
+    c3, bull3, bear3 = c[2:], bull[2:], bear[2:]
+
+    small = ratio2 < SMALL_BODY
+    long_lower = small & (lower2 > 2 * body2) & (upper2 < body2)
+    long_upper = small & (upper2 > 2 * body2) & (lower2 < body2)
+    mid1 = (o1 + c1) / 2
+
+    # Inverted hammer dan shooting star berbentuk sama; arah ditentukan candle konfirmasi
+    tail = mask[2:]
+    tail[long_lower & bull3] |= HAMMER
+    tail[long_upper & bull3] |= INVERTED_HAMMER
+    tail[long_upper & bear3] |= SHOOTING_STAR
+    tail[bear1 & bull2 & (o2 < c1) & (c2 > o1) & bull3] |= BULLISH_ENGULFING
+    tail[bull1 & bear2 & (o2 > c1) & (c2 < o1) & bear3] |= BEARISH_ENGULFING
+    tail[bear1 & (ratio1 >= LONG_BODY) & small & (np.maximum(o2, c2) <= c1) & bull3 & (c3 > mid1)] |= MORNING_STAR
+    tail[bull1 & (ratio1 >= LONG_BODY) & small & (np.minimum(o2, c2) >= c1) & bear3 & (c3 < mid1)] |= EVENING_STAR
+    return mask
+
+
+def scan_frame(df):
+    return scan(df['open'].to_numpy(float), df['high'].to_numpy(float),
+                df['low'].to_numpy(float), df['close'].to_numpy(float))
+
+
+def reversal_pattern(bits):
+    # Bit pola reversal berprioritas tertinggi per bar (0 bila tidak ada); bits skalar atau array
+    bits = np.asarray(bits)
+    return np.select([(bits & bit) != 0 for bit in REVERSAL_PATTERNS], REVERSAL_PATTERNS, 0).astype(np.uint8)
+
+
+def names(bits):
+    return [name for bit, name in PATTERN_NAMES if bits & bit]
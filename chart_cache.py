@@ -0,0 +1,121 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from kline_cache import INTERVAL_MS
+
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def last_closed_open_time(tf, now=None):
+    # Open-time (ms) candle terakhir yang sudah close pada timeframe `tf`
+    step = INTERVAL_MS[tf]
+    now_ms = int((time.time() if now is None else now) * 1000)
+    return (now_ms // step) * step - step
+
+
+def chart_key(symbol, tf, style="fast", now=None):
+    return (symbol, tf, last_closed_open_time(tf, now), style)
+
+
+# === Cache PNG chart (LRU berbasis ukuran) ===
+# Key (symbol, timeframe, open-time candle close terakhir, style): semua tombol
+# CHART dalam candle yang sama memakai PNG yang sama. file_id Telegram dari
+# upload sebelumnya disimpan per bot sehingga foto bisa dikirim ulang tanpa upload.
+class ChartCache:
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.file_id_hits = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # key -> {"png": bytes, "file_ids": {bot: file_id}}
+        self._lock = threading.Lock()
+        self._render_locks = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["png"]
+
+    def put(self, key, png):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old["png"])
+            if len(png) > self.max_bytes:
+                return
+            self._entries[key] = {"png": png, "file_ids": old["file_ids"] if old else {}}
+            self.size += len(png)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted["png"])
+                self.evictions += 1
+
+    def file_id(self, key, bot):
+        with self._lock:
+            entry = self._entries.get(key)
+            file_id = entry["file_ids"].get(bot) if entry else None
+            if file_id:
+                self._entries.move_to_end(key)
+                self.file_id_hits += 1
+            return file_id
+
+    def set_file_id(self, key, bot, file_id):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and file_id:
+                entry["file_ids"][bot] = file_id
+
+    # PNG dari cache, atau render(); render paralel untuk key yang sama digabung
+    def get_or_render(self, key, render):
+        png = self.get(key)
+        if png is not None:
+            return png
+        with self._lock:
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+        with render_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.misses -= 1
+                    return entry["png"]
+            try:
+                png = render()
+                if png:
+                    self.put(key, png)
+                return png
+            finally:
+                with self._lock:
+                    self._render_locks.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "file_id_hits": self.file_id_hits,
+                "evictions": self.evictions,
+            }
+
+
+chart_cache = ChartCache()
@@ -1,19 +1,27 @@
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from io import BytesIO
 from datetime import datetime
-from binance.client import Client
-from scipy.signal import argrelextrema
+from binance_governor import binance_client
 import ta
 import logging
-from telegram import Bot
-import mplfinance as mpf
 from ta.momentum import RSIIndicator
 from ta.trend import MACD
-from mplfinance.original_flavor import candlestick_ohlc
 import matplotlib.dates as mdates
+import matplotlib.transforms as mtransforms
+import threading
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from kline_cache import kline_cache
+from kline_stream import stream_klines
+from ohlcv import OHLCVWindow
+from kline_store import kline_store
+from chart_cache import chart_cache, chart_key
+from metrics import stage, timed
+import candle_patterns
+from candle_patterns import BULLISH_PATTERNS, BEARISH_PATTERNS
 
 # === Konfigurasi ===
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
@@ -21,86 +29,221 @@ BINANCE_API_SECRET = os.getenv("BINANCE_API_SECRET")
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-client = Client(BINANCE_API_KEY, BINANCE_API_SECRET)
-bot = Bot(token=TELEGRAM_TOKEN)
+client = binance_client(BINANCE_API_KEY, BINANCE_API_SECRET)
+_bot = None
+
+# python-telegram-bot hanya dipakai send_all_timeframes; import & inisialisasi saat perlu
+def telegram_bot():
+    global _bot
+    if _bot is None:
+        from telegram import Bot
+        _bot = Bot(token=TELEGRAM_TOKEN)
+    return _bot
 
 # === Logging ===
 logging.basicConfig(level=logging.INFO)
 
 # === Ambil Data dari Binance ===
+@timed("binance")
+def fetch_klines(symbol, interval, limit):
+    return client.get_klines(symbol=symbol, interval=interval, limit=limit)
+
+@timed("binance")
+def fetch_kline_page(symbol, interval, limit, end_time=None):
+    if end_time is None:
+        return client.get_klines(symbol=symbol, interval=interval, limit=limit)
+    return client.get_klines(symbol=symbol, interval=interval, limit=limit, endTime=end_time)
+
+def fetch_ohlcv(symbol, interval, limit):
+    return kline_store("spot").live(symbol, interval, limit, fetch_kline_page)
+
 def get_klines(symbol, interval="1m", limit=500):
-    raw = client.get_klines(symbol=symbol, interval=interval, limit=limit)
-    df = pd.DataFrame(raw, columns=[
-        'timestamp', 'open', 'high', 'low', 'close', 'volume',
-        'close_time', 'quote_asset_volume', 'number_of_trades',
-        'taker_buy_base', 'taker_buy_quote', 'ignore'
-    ])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df.set_index('timestamp', inplace=True)
-    df = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
-    return df
+    raw = stream_klines(symbol, interval, limit)
+    if raw is not None:
+        return OHLCVWindow.from_klines(raw).to_frame()
+    return kline_cache.get(symbol, interval, limit, fetch_ohlcv).to_frame()
 
 # === Supertrend ===
-def calculate_supertrend(df, period=10, multiplier=3):
-    hl2 = (df['high'] + df['low']) / 2
-    atr = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=period).average_true_range()
-    upperband = hl2 + (multiplier * atr)
-    lowerband = hl2 - (multiplier * atr)
-    supertrend = [True] * len(df)
-
-    for i in range(1, len(df)):
-        if df['close'].iloc[i] > upperband.iloc[i - 1]:
-            supertrend[i] = True
-        elif df['close'].iloc[i] < lowerband.iloc[i - 1]:
-            supertrend[i] = False
+# Kernel berbasis array NumPy. Input 1D (satu simbol) atau 2D (simbol x bar) untuk
+# batch banyak simbol sekaligus. Band trailing bergantung pada trend bar
+# sebelumnya, jadi rekurensinya tetap berjalan per bar: untuk satu simbol lewat
+# float Python (tanpa .iloc), untuk batch tiap langkah divektorkan lintas simbol.
+# Aritmetika sama persis dengan versi pandas/ta sebelumnya (output identik).
+def atr_wilder(high, low, close, window=14):
+    # ta.volatility.AverageTrueRange: 0 sampai window-1, rata-rata TR, lalu Wilder
+    high, low, close = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (high, low, close))
+    tr = high - low
+    prev_close = close[:, :-1]
+    tr[:, 1:] = np.fmax(tr[:, 1:], np.fmax(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close)))
+    atr = np.zeros_like(tr)
+    n = tr.shape[1]
+    if n < window:
+        return atr
+    atr[:, window - 1] = tr[:, :window].mean(axis=1)
+    if tr.shape[0] == 1:
+        prev = float(atr[0, window - 1])
+        out = atr[0]
+        for i, value in enumerate(tr[0, window:].tolist(), start=window):
+            prev = (prev * (window - 1) + value) / float(window)
+            out[i] = prev
+    else:
+        for i in range(window, n):
+            atr[:, i] = (atr[:, i - 1] * (window - 1) + tr[:, i]) / float(window)
+    return atr
+
+
+def _supertrend_single(close, upper, lower):
+    close, upper, lower = close.tolist(), upper.tolist(), lower.tolist()
+    trend = [True] * len(close)
+    for i in range(1, len(close)):
+        if close[i] > upper[i - 1]:
+            trend[i] = True
+        elif close[i] < lower[i - 1]:
+            trend[i] = False
         else:
-            supertrend[i] = supertrend[i - 1]
-            if supertrend[i] and lowerband.iloc[i] < lowerband.iloc[i - 1]:
-                lowerband.iloc[i] = lowerband.iloc[i - 1]
-            if not supertrend[i] and upperband.iloc[i] > upperband.iloc[i - 1]:
-                upperband.iloc[i] = upperband.iloc[i - 1]
+            trend[i] = trend[i - 1]
+            if trend[i] and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if not trend[i] and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+    return np.array(trend, dtype=bool), np.array(upper), np.array(lower)
+
 
+def supertrend_arrays(high, low, close, period=10, multiplier=3):
+    # Return (trend bool, upperband, lowerband) dengan shape yang sama seperti input
+    single = np.ndim(close) == 1
+    high, low, close = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (high, low, close))
+    hl2 = (high + low) / 2
+    atr = atr_wilder(high, low, close, window=period)
+    upper = hl2 + (multiplier * atr)
+    lower = hl2 - (multiplier * atr)
+
+    if close.shape[0] == 1:
+        trend, up, lo = _supertrend_single(close[0], upper[0], lower[0])
+        trend, upper, lower = trend[None], up[None], lo[None]
+    else:
+        trend = np.ones(close.shape, dtype=bool)
+        for i in range(1, close.shape[1]):
+            up_break = close[:, i] > upper[:, i - 1]
+            down_break = close[:, i] < lower[:, i - 1]
+            hold = ~(up_break | down_break)
+            t = up_break | (hold & trend[:, i - 1])
+            trend[:, i] = t
+            clamp = hold & t & (lower[:, i] < lower[:, i - 1])
+            lower[clamp, i] = lower[clamp, i - 1]
+            clamp = hold & ~t & (upper[:, i] > upper[:, i - 1])
+            upper[clamp, i] = upper[clamp, i - 1]
+
+    if single:
+        return trend[0], upper[0], lower[0]
+    return trend, upper, lower
+
+
+def calculate_supertrend(df, period=10, multiplier=3):
+    trend, upper, lower = supertrend_arrays(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), period, multiplier)
     return pd.DataFrame({
-        'supertrend': supertrend,
-        'upperband': upperband,
-        'lowerband': lowerband
+        'supertrend': trend,
+        'upperband': upper,
+        'lowerband': lower
     }, index=df.index)
 
+
+def calculate_supertrend_batch(frames, period=10, multiplier=3):
+    # frames: {symbol: df} dengan panjang sama -> {symbol: DataFrame supertrend}
+    symbols = list(frames)
+    stack = {col: np.vstack([frames[s][col].to_numpy(np.float64) for s in symbols]) for col in ('high', 'low', 'close')}
+    trend, upper, lower = supertrend_arrays(stack['high'], stack['low'], stack['close'], period, multiplier)
+    return {
+        s: pd.DataFrame({'supertrend': trend[k], 'upperband': upper[k], 'lowerband': lower[k]}, index=frames[s].index)
+        for k, s in enumerate(symbols)
+    }
+
 # === Multi Timeframe Chart ===
-def draw_chart_by_timeframe(symbol='BTCUSDT', tf='1m'):
+CHART_FAST_RENDER = os.getenv("CHART_FAST_RENDER", "1") != "0"
+
+OFFSET_MAP = {
+    '1m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=10),
+    '15m': pd.Timedelta(minutes=20),
+    '1h': pd.Timedelta(hours=1),
+    '4h': pd.Timedelta(hours=2),
+    '1d': pd.Timedelta(days=1),
+}
+
+WIDTH_MAP = {
+    '1m': 0.0005,
+    '5m': 0.002,
+    '15m': 0.005,
+    '1h': 0.01,
+    '4h': 0.02,
+    '1d': 0.05
+}
+
+def prepare_chart_data(symbol, tf):
     df = get_klines(symbol, interval=tf)
-    df['EMA50'] = ta.trend.EMAIndicator(df['close'], 50).ema_indicator()
-    df['EMA200'] = ta.trend.EMAIndicator(df['close'], 200).ema_indicator()
+    with stage("indicators"):
+        df['EMA50'] = ta.trend.EMAIndicator(df['close'], 50).ema_indicator()
+        df['EMA200'] = ta.trend.EMAIndicator(df['close'], 200).ema_indicator()
+
+        boll = ta.volatility.BollingerBands(df['close'], window=20, window_dev=2)
+        df['BB_upper'] = boll.bollinger_hband()
+        df['BB_middle'] = boll.bollinger_mavg()
+        df['BB_lower'] = boll.bollinger_lband()
 
-    boll = ta.volatility.BollingerBands(df['close'], window=20, window_dev=2)
-    df['BB_upper'] = boll.bollinger_hband()
-    df['BB_middle'] = boll.bollinger_mavg()
-    df['BB_lower'] = boll.bollinger_lband()
+        df['RSI'] = RSIIndicator(df['close'], window=14).rsi()
+        macd = MACD(df['close'], window_slow=26, window_fast=12, window_sign=9)
+        df['MACD'] = macd.macd()
+        df['MACD_signal'] = macd.macd_signal()
 
-    df['RSI'] = RSIIndicator(df['close'], window=14).rsi()
-    macd = MACD(df['close'], window_slow=26, window_fast=12, window_sign=9)
-    df['MACD'] = macd.macd()
-    df['MACD_signal'] = macd.macd_signal()
+        st = calculate_supertrend(df)
+        df['Volume_MA20'] = df['volume'].rolling(window=20).mean()
+    return df, st
+
+# Sama dengan scipy.signal.argrelextrema(mode='clip'), tanpa import scipy (~1 detik saat start)
+def relative_extrema(data, comparator, order=1):
+    idx = np.arange(len(data))
+    keep = np.ones(len(data), dtype=bool)
+    for shift in range(1, order + 1):
+        keep &= comparator(data, data[np.minimum(idx + shift, len(data) - 1)])
+        keep &= comparator(data, data[np.maximum(idx - shift, 0)])
+    return np.flatnonzero(keep)
+
+def support_resistance(df):
+    support_idx = relative_extrema(df['low'].values, np.less_equal, order=10)
+    resistance_idx = relative_extrema(df['high'].values, np.greater_equal, order=10)
+    support = df['low'].iloc[support_idx].tail(3)
+    resistance = df['high'].iloc[resistance_idx].tail(3)
+    return support, resistance
 
-    st = calculate_supertrend(df)
-    df['Volume_MA20'] = df['volume'].rolling(window=20).mean()
+# Marker pola candle (bitmask candle_patterns): bullish di bawah low, bearish di atas high
+def pattern_markers(o, h, l, c):
+    bits = candle_patterns.scan(o, h, l, c)
+    pad = (np.nanmax(h) - np.nanmin(l)) * 0.01 if len(h) else 0.0
+    bull = np.flatnonzero(bits & BULLISH_PATTERNS)
+    bear = np.flatnonzero(bits & BEARISH_PATTERNS)
+    return bull, l[bull] - pad, bear, h[bear] + pad
 
+def draw_chart_by_timeframe(symbol='BTCUSDT', tf='1m', fast=CHART_FAST_RENDER):
+    df, st = prepare_chart_data(symbol, tf)
+    if fast:
+        return render_chart_fast(df, st, symbol, tf)
+    return render_chart(df, st, symbol, tf)
+
+# === Render lama (satu artist per candle) ===
+# Figure dibuat lewat API OO (bukan pyplot) karena handler berjalan di beberapa thread
+# sekaligus dan state figure "aktif" milik pyplot tidak thread-safe.
+@timed("render")
+def render_chart(df, st, symbol, tf):
+    from mplfinance.original_flavor import candlestick_ohlc
     df_ohlc = df[['open', 'high', 'low', 'close']].copy()
     df_ohlc['Date'] = df_ohlc.index.map(mdates.date2num)
     ohlc = df_ohlc[['Date', 'open', 'high', 'low', 'close']]
 
-    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 9), sharex=True,
-                                        gridspec_kw={'height_ratios': [3, 1.5, 1]})
+    fig = Figure(figsize=(12, 9))
+    FigureCanvasAgg(fig)
+    ax1, ax2, ax3 = fig.subplots(3, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1.5, 1]})
 
-    offset_map = {
-        '1m': pd.Timedelta(minutes=2),
-        '5m': pd.Timedelta(minutes=10),
-        '15m': pd.Timedelta(minutes=20),
-        '1h': pd.Timedelta(hours=1),
-        '4h': pd.Timedelta(hours=2),
-        '1d': pd.Timedelta(days=1),
-    }
-    x_offset = offset_map.get(tf, pd.Timedelta(minutes=10))
+    x_offset = OFFSET_MAP.get(tf, pd.Timedelta(minutes=10))
 
     # === Candlestick
     candlestick_ohlc(ax1, ohlc.values, width=0.0005, colorup='g', colordown='r', alpha=0.8)
@@ -114,11 +257,13 @@ def draw_chart_by_timeframe(symbol='BTCUSDT', tf='1m'):
         color = 'green' if st['supertrend'].iloc[j] else 'red'
         ax1.axvspan(df.index[j-1], df.index[j], color=color, alpha=0.03)
 
+    # === Pola candle
+    bull, bull_y, bear, bear_y = pattern_markers(*(df[k].to_numpy(float) for k in ('open', 'high', 'low', 'close')))
+    ax1.plot(df.index[bull], bull_y, linestyle='none', marker='^', markersize=4, color='green')
+    ax1.plot(df.index[bear], bear_y, linestyle='none', marker='v', markersize=4, color='red')
+
     # === Support & Resistance
-    support_idx = argrelextrema(df['low'].values, np.less_equal, order=10)[0]
-    resistance_idx = argrelextrema(df['high'].values, np.greater_equal, order=10)[0]
-    support = df['low'].iloc[support_idx].tail(3)
-    resistance = df['high'].iloc[resistance_idx].tail(3)
+    support, resistance = support_resistance(df)
 
     x_pos = df.index[-1]
 
@@ -175,15 +320,7 @@ def draw_chart_by_timeframe(symbol='BTCUSDT', tf='1m'):
     ax2.grid(True)
 
     # === Volume with MA
-    width_map = {
-        '1m': 0.0005,
-        '5m': 0.002,
-        '15m': 0.005,
-        '1h': 0.01,
-        '4h': 0.02,
-        '1d': 0.05
-    }
-    bar_width = width_map.get(tf, 0.002)
+    bar_width = WIDTH_MAP.get(tf, 0.002)
     colors = ['green' if c >= o else 'red' for c, o in zip(df['close'], df['open'])]
 
     ax3.bar(df.index, df['volume'], color=colors, width=bar_width, alpha=0.4, label='Volume')
@@ -197,20 +334,287 @@ def draw_chart_by_timeframe(symbol='BTCUSDT', tf='1m'):
     fig.text(0.5, 0.5, "Signal Future Pro", fontsize=40, color='gray',
              ha='center', va='center', alpha=0.1, rotation=30)
 
-    plt.tight_layout(h_pad=1.5)
+    fig.tight_layout(h_pad=1.5)
     buf = BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
+    fig.savefig(buf, format='png')
+    buf.seek(0)
+    return buf
+
+# === Render cepat (template Figure per timeframe + collection) ===
+# Candle, shading supertrend dan bar volume masing-masing satu collection,
+# garis indikator dipakai ulang lewat set_data, layout dihitung sekali per template.
+class ChartTemplate:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fig = Figure(figsize=(12, 9))
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax1, self.ax2, self.ax3 = self.fig.subplots(3, 1, sharex=True,
+                                                         gridspec_kw={'height_ratios': [3, 1.5, 1]})
+        self.ax2b = self.ax2.twinx()
+        ax1, ax2, ax2b, ax3 = self.ax1, self.ax2, self.ax2b, self.ax3
+
+        self.lines = {
+            'EMA50': ax1.plot([], [], color='lime', label='EMA50')[0],
+            'EMA200': ax1.plot([], [], color='orange', label='EMA200')[0],
+            'BB_upper': ax1.plot([], [], color='blue', linestyle='--', linewidth=0.5)[0],
+            'BB_middle': ax1.plot([], [], color='blue', linewidth=0.5)[0],
+            'BB_lower': ax1.plot([], [], color='blue', linestyle='--', linewidth=0.5)[0],
+            'RSI': ax2.plot([], [], label='RSI', color='purple')[0],
+            'MACD': ax2b.plot([], [], label='MACD', color='black')[0],
+            'MACD_signal': ax2b.plot([], [], label='Signal', color='orange', linestyle='--')[0],
+            'Volume_MA20': ax3.plot([], [], color='blue', linewidth=0.8, label='Volume MA20')[0],
+        }
+
+        # Shading supertrend: x dalam koordinat data, y selalu penuh tinggi axes
+        self.shading = PolyCollection([], alpha=0.03,
+                                      transform=mtransforms.blended_transform_factory(ax1.transData, ax1.transAxes))
+        ax1.add_collection(self.shading, autolim=False)
+        self.wicks = LineCollection([], linewidths=0.5, antialiaseds=True)
+        ax1.add_collection(self.wicks, autolim=False)
+        self.bodies = PolyCollection([], alpha=0.8)
+        ax1.add_collection(self.bodies, autolim=False)
+        self.volume = PolyCollection([], alpha=0.4, linewidths=0, label='Volume')
+        self.bull_markers = ax1.plot([], [], linestyle='none', marker='^', markersize=4, color='green')[0]
+        self.bear_markers = ax1.plot([], [], linestyle='none', marker='v', markersize=4, color='red')[0]
+        ax3.add_collection(self.volume, autolim=False)
+
+        ax1.xaxis_date()
+        ax1.grid(True)
+        ax2.axhline(70, color='red', linestyle='--', linewidth=0.5)
+        ax2.axhline(30, color='green', linestyle='--', linewidth=0.5)
+        ax2.set_title("RSI & MACD")
+        ax2.grid(True)
+        ax3.set_title("Volume")
+        ax3.set_ylabel("Volume", fontsize=8)
+        ax3.grid(True)
+        self.fig.text(0.5, 0.5, "Signal Future Pro", fontsize=40, color='gray',
+                      ha='center', va='center', alpha=0.1, rotation=30)
+
+        self.dynamic = []
+        self.layout_key = None  # _layout_key() saat layout terakhir dihitung
+        self.legend_size = {}   # ukuran legend per axes (fraksi axes), diukur di render pertama
+
+_chart_templates = {}
+_chart_templates_lock = threading.Lock()
+
+def chart_template(tf):
+    with _chart_templates_lock:
+        if tf not in _chart_templates:
+            _chart_templates[tf] = ChartTemplate()
+        return _chart_templates[tf]
+
+# Tanda layout: panjang judul + panjang label tick sumbu-y dan teks offset-nya. Lebar label
+# mengikuti skala harga (110000 vs 0.0000123), jadi template yang dipakai bergantian
+# oleh banyak simbol menghitung ulang layout hanya bila tanda ini berubah.
+def _layout_key(tpl):
+    key = [len(tpl.ax1.get_title())]
+    for ax in (tpl.ax1, tpl.ax2, tpl.ax2b, tpl.ax3):
+        axis = ax.yaxis
+        lo, hi = sorted(axis.get_view_interval())
+        locs = [t for t in axis.get_major_locator()() if lo <= t <= hi]
+        formatter = axis.get_major_formatter()
+        labels = formatter.format_ticks(locs)
+        key.append((max((len(t) for t in labels), default=0), formatter.get_offset()))
+    return tuple(key)
+
+def _padded(lo, hi, margin=0.05):
+    pad = (hi - lo) * margin or abs(hi) * margin or 1.0
+    return lo - pad, hi + pad
+
+# Posisi kandidat legend (kode loc matplotlib 1-10) sebagai anchor (x, y) fraksi axes
+LEGEND_ANCHORS = [
+    (1, 1.0, 1.0), (2, 0.0, 1.0), (3, 0.0, 0.0), (4, 1.0, 0.0), (5, 1.0, 0.5),
+    (6, 0.0, 0.5), (7, 1.0, 0.5), (8, 0.5, 0.0), (9, 0.5, 1.0), (10, 0.5, 0.5),
+]
+
+# Versi vektor dari loc='best': pilih posisi yang menutupi data paling sedikit.
+# `series` dihitung sebagai titik (garis), `spans` sebagai rentang vertikal (lo, hi) per bar.
+def best_legend_loc(ax, x, series, spans, size, pad=0.01):
+    w, h = size
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    fx = (x - x0) / (x1 - x0)
+    px = np.tile(fx, len(series))
+    py = (np.concatenate(series) - y0) / (y1 - y0)
+    best = None
+    for code, ax_x, ax_y in LEGEND_ANCHORS:
+        left = min(max(ax_x - w * ax_x, pad), 1 - w - pad)
+        bottom = min(max(ax_y - h * ax_y, pad), 1 - h - pad)
+        inside = (px >= left) & (px <= left + w) & (py >= bottom) & (py <= bottom + h)
+        badness = int(np.count_nonzero(inside))
+        in_x = (fx >= left) & (fx <= left + w)
+        for lo, hi in spans:
+            lo = (lo - y0) / (y1 - y0)
+            hi = (hi - y0) / (y1 - y0)
+            badness += int(np.count_nonzero(in_x & (hi >= bottom) & (lo <= bottom + h)))
+        if best is None or badness < best[0]:
+            best = (badness, code)
+        if badness == 0:
+            break
+    return best[1]
+
+def _legend(tpl, ax, x, series, spans, **kwargs):
+    size = tpl.legend_size.get(ax)
+    loc = best_legend_loc(ax, x, series, spans, size) if size else 'best'
+    return ax.legend(loc=loc, **kwargs)
+
+@timed("render")
+def render_chart_fast(df, st, symbol, tf):
+    x = mdates.date2num(df.index.to_pydatetime())
+    o = df['open'].to_numpy(float)
+    h = df['high'].to_numpy(float)
+    l = df['low'].to_numpy(float)
+    c = df['close'].to_numpy(float)
+    v = df['volume'].to_numpy(float)
+    up = c >= o
+    candle_colors = np.where(up, 'g', 'r')
+    support, resistance = support_resistance(df)
+    x_offset = OFFSET_MAP.get(tf, pd.Timedelta(minutes=10))
+    x_text = mdates.date2num(df.index[-1] + x_offset)
+    x_last = x[-1]
+
+    tpl = chart_template(tf)
+    with tpl.lock:
+        ax1, ax2, ax2b, ax3 = tpl.ax1, tpl.ax2, tpl.ax2b, tpl.ax3
+        for artist in tpl.dynamic:
+            artist.remove()
+        tpl.dynamic = []
+
+        # === Candlestick (wick + body)
+        half = 0.0005 / 2
+        tpl.wicks.set_segments(np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1))
+        tpl.wicks.set_color(candle_colors)
+        lower = np.minimum(o, c)
+        upper = np.maximum(o, c)
+        tpl.bodies.set_verts(np.stack([
+            np.column_stack([x - half, lower]), np.column_stack([x - half, upper]),
+            np.column_stack([x + half, upper]), np.column_stack([x + half, lower]),
+        ], axis=1))
+        tpl.bodies.set_facecolor(candle_colors)
+        tpl.bodies.set_edgecolor(candle_colors)
+
+        # === Supertrend shading sebagai satu collection
+        trend = st['supertrend'].to_numpy(bool)[1:]
+        x0, x1 = x[:-1], x[1:]
+        tpl.shading.set_verts(np.stack([
+            np.column_stack([x0, np.zeros_like(x0)]), np.column_stack([x0, np.ones_like(x0)]),
+            np.column_stack([x1, np.ones_like(x0)]), np.column_stack([x1, np.zeros_like(x0)]),
+        ], axis=1))
+        tpl.shading.set_color(np.where(trend, 'green', 'red'))
+
+        for name, line in tpl.lines.items():
+            line.set_data(x, df[name].to_numpy(float))
+
+        # === Pola candle
+        bull, bull_y, bear, bear_y = pattern_markers(o, h, l, c)
+        tpl.bull_markers.set_data(x[bull], bull_y)
+        tpl.bear_markers.set_data(x[bear], bear_y)
+
+        # === Support & Resistance
+        for levels, color in ((support, 'green'), (resistance, 'red')):
+            for lvl in levels:
+                tpl.dynamic.append(ax1.axhline(lvl, color=color, linestyle='--', linewidth=0.5))
+                tpl.dynamic.append(ax1.text(x_text, lvl, f'{lvl:.2f}', va='center', ha='left',
+                                            fontsize=7, color=color,
+                                            bbox=dict(facecolor='white', alpha=0.5, edgecolor='none')))
+
+        # === Last Price & Breaks
+        last_price = c[-1]
+        tpl.dynamic.append(ax1.axhline(last_price, color='black', linestyle='--', linewidth=0.6))
+        tpl.dynamic.append(ax1.text(x_text, last_price, f'{last_price:.2f}',
+                                    va='center', ha='left', fontsize=8, color='black',
+                                    bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.2', alpha=0.7)))
+        if not support.empty and last_price < support.min():
+            tpl.dynamic.append(ax1.annotate("⬇️ Breakdown", xy=(x_last, last_price),
+                                            xytext=(x_last, last_price * 1.01),
+                                            arrowprops=dict(arrowstyle="->", color='red'),
+                                            color='red', fontsize=9, ha='center'))
+        if not resistance.empty and last_price > resistance.max():
+            tpl.dynamic.append(ax1.annotate("⬆️ Breakout", xy=(x_last, last_price),
+                                            xytext=(x_last, last_price * 0.99),
+                                            arrowprops=dict(arrowstyle="->", color='green'),
+                                            color='green', fontsize=9, ha='center'))
+
+        # === MACD histogram
+        macd = df['MACD'].to_numpy(float)
+        macd_signal = df['MACD_signal'].to_numpy(float)
+        tpl.dynamic.append(ax2b.fill_between(x, macd - macd_signal, 0, where=(macd > macd_signal), alpha=0.2, color='green'))
+        tpl.dynamic.append(ax2b.fill_between(x, macd - macd_signal, 0, where=(macd < macd_signal), alpha=0.2, color='red'))
+
+        # === Volume bars sebagai satu collection
+        bar_half = WIDTH_MAP.get(tf, 0.002) / 2
+        tpl.volume.set_verts(np.stack([
+            np.column_stack([x - bar_half, np.zeros_like(v)]), np.column_stack([x - bar_half, v]),
+            np.column_stack([x + bar_half, v]), np.column_stack([x + bar_half, np.zeros_like(v)]),
+        ], axis=1))
+        tpl.volume.set_facecolor(np.where(up, 'green', 'red'))
+
+        # === Skala: collection tidak ikut relim, jadi batas dihitung langsung
+        price_cols = np.concatenate([l, h] + [df[k].to_numpy(float) for k in ('EMA50', 'EMA200', 'BB_upper', 'BB_lower')])
+        ax1.set_xlim(*_padded(x[0] - half, x[-1] + half))
+        ax1.set_ylim(*_padded(np.nanmin(price_cols), np.nanmax(price_cols)))
+        for ax in (ax2, ax2b):
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+        ax3.set_ylim(0, np.nanmax(v) * 1.05 if len(v) else 1)
+
+        ax1.set_title(f"{symbol} - {tf.upper()} Chart")
+        _legend(tpl, ax1, x, [df[k].to_numpy(float) for k in ('EMA50', 'EMA200', 'BB_upper', 'BB_middle', 'BB_lower')],
+                [(l, h)], fontsize=6)
+        ax2.legend(loc='upper left', fontsize=6)
+        ax2b.legend(loc='upper right', fontsize=6)
+        _legend(tpl, ax3, x, [df['Volume_MA20'].to_numpy(float)], [(np.zeros_like(v), v)], fontsize=6)
+
+        layout_key = _layout_key(tpl)
+        if layout_key != tpl.layout_key:
+            # Layout dihitung ulang hanya saat judul/lebar label berubah, selain itu tanpa layout engine
+            tpl.fig.tight_layout(h_pad=1.5)
+            tpl.fig.set_layout_engine('none')
+            tpl.layout_key = layout_key
+            tpl.legend_size = {}   # ukuran axes berubah: ukur ulang legend setelah render ini
+
+        buf = BytesIO()
+        tpl.fig.savefig(buf, format='png')
+
+        if not tpl.legend_size:
+            for ax in (ax1, ax3):
+                box = ax.get_legend().get_window_extent().transformed(ax.transAxes.inverted())
+                tpl.legend_size[ax] = (box.width, box.height)
     buf.seek(0)
     return buf
 
+# === Chart dengan cache PNG / file_id Telegram ===
+def draw_chart_cached(symbol='BTCUSDT', tf='1m', fast=CHART_FAST_RENDER):
+    key = chart_key(symbol, tf, "fast" if fast else "legacy")
+    png = chart_cache.get_or_render(key, lambda: draw_chart_by_timeframe(symbol, tf, fast).getvalue())
+    return key, png
+
+def bot_id(token):
+    return (token or "").split(":")[0]
+
+# Kirim chart lewat `bot` (telebot atau python-telegram-bot): pakai file_id bila
+# chart yang sama sudah pernah di-upload bot ini, kalau tidak kirim PNG dari cache.
+def send_chart(bot, token, chat_id, symbol, tf, caption=None):
+    key = chart_key(symbol, tf, "fast" if CHART_FAST_RENDER else "legacy")
+    file_id = chart_cache.file_id(key, bot_id(token))
+    if file_id:
+        with stage("telegram"):
+            return bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption)
+    key, png = draw_chart_cached(symbol, tf)
+    with stage("telegram"):
+        msg = bot.send_photo(chat_id=chat_id, photo=BytesIO(png), caption=caption)
+    photos = getattr(msg, "photo", None)
+    if photos:
+        chart_cache.set_file_id(key, bot_id(token), photos[-1].file_id)
+    return msg
+
 def send_all_timeframes(symbol='BTCUSDT'):
+    bot = telegram_bot()
     timeframes = ['1m', '5m', '15m', '1h']
     for tf in timeframes:
         try:
-            chart = draw_chart_by_timeframe(symbol, tf)
             caption = f"📊 {symbol} - {tf.upper()} Multi-Indicator Chart"
-            bot.send_photo(chat_id=TELEGRAM_CHAT_ID, photo=chart, caption=caption)
+            send_chart(bot, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, symbol, tf, caption=caption)
         except Exception as e:
             logging.warning(f"Gagal kirim chart {tf}: {e}")
             bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=f"❌ Gagal kirim chart {symbol} - {tf}")
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from kline_cache import INTERVAL_MS
+from kline_store import kline_store, download_range, merge_arrays, last_closed_open_time
+
+def to_ms(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+# === Loader histori kline ===
+# Mengunduh klines untuk rentang tanggal dengan paging mundur (endTime, 1000 candle
+# per request) ke KlineStore lokal. Pemanggilan berikutnya memakai data di store
+# dan hanya mengunduh bagian yang belum ada: tail setelah candle tersimpan
+# terakhir, atau head bila rentang diminta lebih awal dari yang pernah dicakup.
+# Hasil berupa OHLCVWindow zero-copy di atas file memory-mapped.
+# `fetch_page(symbol, interval, limit, end_time)` mengembalikan baris format REST.
+class HistoryLoader:
+    def __init__(self, fetch_page, store=None):
+        self.fetch_page = fetch_page
+        self.store = store or kline_store("spot")
+
+    def download(self, symbol, interval, start_ms, end_ms):
+        return download_range(self.fetch_page, symbol, interval, start_ms, end_ms, self.store.page_limit)
+
+    def load(self, symbol, interval, start=None, end=None, days=None):
+        step = INTERVAL_MS[interval]
+        end_ms = last_closed_open_time(interval)
+        if end is not None:
+            end_ms = min(to_ms(end), end_ms)
+        if start is None:
+            start = end_ms - int((days or 30) * 86_400_000)
+        start_ms = (to_ms(start) // step) * step
+
+        store = self.store
+        rec = store.records(symbol, interval)
+        if not len(rec):
+            store.append(symbol, interval, *self.download(symbol, interval, start_ms, end_ms))
+            store.set_meta(symbol, interval, covered_from=start_ms)
+        else:
+            # covered_from: awal rentang yang pernah diminta (bisa sebelum listing simbol)
+            covered_from = store.meta(symbol, interval).get("covered_from", int(rec["open_time"][0]))
+            if start_ms < covered_from:
+                head = self.download(symbol, interval, start_ms, covered_from - step)
+                if len(head[0]):
+                    stored = store.window(rec)
+                    store.rewrite(symbol, interval, *merge_arrays(head, (np.array(stored.open_time), np.array(stored.column_block()))))
+                store.set_meta(symbol, interval, covered_from=start_ms)
+            last = int(rec["open_time"][-1])
+            if end_ms > last:
+                tail = self.download(symbol, interval, last + step, end_ms)
+                store.append(symbol, interval, *tail, fetch_page=self.fetch_page)
+
+        return store.read(symbol, interval, start_ms, end_ms)
@@ -0,0 +1,236 @@
+import math
+import threading
+from collections import deque
+
+from kline_cache import INTERVAL_MS
+
+# === Indikator streaming ===
+# Tiap indikator menyimpan state hasil candle yang sudah close.
+# step(x) menghitung (state_baru, nilai) tanpa mengubah state, sehingga
+# update() = commit candle close, peek() = nilai sementara candle berjalan.
+# Rumus mengikuti library `ta` (dan pandas ewm untuk EMA20 di webhook.py);
+# bila diberi histori yang sama, hasilnya sama dalam toleransi floating-point.
+
+
+class StreamEMA:
+    # adjust=False: sama dengan ta.trend.EMAIndicator / ewm(adjust=False)
+    # adjust=True : sama dengan df['close'].ewm(span=...).mean()
+    def __init__(self, span=None, alpha=None, adjust=False, min_periods=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.adjust = adjust
+        self.min_periods = min_periods if min_periods is not None else (0 if adjust else span)
+        self.state = (0, None, 0.0)  # (jumlah data, numerator/rata-rata, denominator)
+
+    def step(self, x, state=None):
+        count, num, den = self.state if state is None else state
+        if x is None or math.isnan(x):
+            new = (count, num, den)
+        elif num is None:
+            new = (count + 1, x, 1.0)
+        elif self.adjust:
+            w = 1.0 - self.alpha
+            new = (count + 1, x + w * num, 1.0 + w * den)
+        else:
+            new = (count + 1, (1.0 - self.alpha) * num + self.alpha * x, 1.0)
+        value = new[1] / new[2] if new[1] is not None and new[0] >= max(self.min_periods, 1) else math.nan
+        return new, value
+
+    def update(self, x):
+        self.state, value = self.step(x)
+        return value
+
+    def peek(self, x):
+        return self.step(x)[1]
+
+
+class StreamRSI:
+    # ta.momentum.RSIIndicator: Wilder smoothing alpha=1/window
+    def __init__(self, window=14):
+        self.up = StreamEMA(alpha=1.0 / window, min_periods=window)
+        self.down = StreamEMA(alpha=1.0 / window, min_periods=window)
+        self.prev_close = None
+
+    def step(self, close):
+        diff = close - self.prev_close if self.prev_close is not None else math.nan
+        up_state, up = self.up.step(diff if diff > 0 else 0.0)
+        down_state, down = self.down.step(-diff if diff < 0 else 0.0)
+        if math.isnan(down):
+            value = math.nan
+        elif down == 0:
+            value = 100.0
+        else:
+            value = 100 - (100 / (1 + up / down))
+        return (up_state, down_state, close), value
+
+    def update(self, close):
+        (self.up.state, self.down.state, self.prev_close), value = self.step(close)
+        return value
+
+    def peek(self, close):
+        return self.step(close)[1]
+
+
+class StreamBollinger:
+    # ta.volatility.BollingerBands: rolling mean & std(ddof=0) pada window tetap
+    def __init__(self, window=20, window_dev=2):
+        self.window = window
+        self.window_dev = window_dev
+        self.values = deque(maxlen=window)
+
+    def step(self, close):
+        values = list(self.values)[-(self.window - 1):] + [close] if self.window > 1 else [close]
+        if len(values) < self.window:
+            return None, (math.nan, math.nan, math.nan)
+        mean = math.fsum(values) / self.window
+        std = math.sqrt(math.fsum((v - mean) ** 2 for v in values) / self.window)
+        return None, (mean + self.window_dev * std, mean, mean - self.window_dev * std)
+
+    def update(self, close):
+        value = self.step(close)[1]
+        self.values.append(close)
+        return value
+
+    def peek(self, close):
+        return self.step(close)[1]
+
+
+class StreamATR:
+    # ta.volatility.AverageTrueRange: 0 sampai window-1, lalu rata-rata TR, lalu Wilder
+    def __init__(self, window=14):
+        self.window = window
+        self.state = (0, None, 0.0, 0.0)  # (jumlah, close sebelumnya, jumlah TR awal, atr)
+
+    def step(self, high, low, close, state=None):
+        count, prev_close, tr_sum, atr = self.state if state is None else state
+        tr = high - low
+        if prev_close is not None:
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        count += 1
+        if count < self.window:
+            tr_sum += tr
+            value = 0.0
+        elif count == self.window:
+            tr_sum += tr
+            value = tr_sum / self.window
+        else:
+            value = (atr * (self.window - 1) + tr) / float(self.window)
+        return (count, close, tr_sum, value), value
+
+    def update(self, high, low, close):
+        self.state, value = self.step(high, low, close)
+        return value
+
+    def peek(self, high, low, close):
+        return self.step(high, low, close)[1]
+
+
+class StreamMACD:
+    # ta.trend.MACD: EMA fast - EMA slow, signal = EMA(macd)
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9):
+        self.fast = StreamEMA(span=window_fast)
+        self.slow = StreamEMA(span=window_slow)
+        self.signal = StreamEMA(span=window_sign)
+
+    def step(self, close):
+        fast_state, fast = self.fast.step(close)
+        slow_state, slow = self.slow.step(close)
+        macd = fast - slow
+        signal_state, signal = self.signal.step(macd)
+        return (fast_state, slow_state, signal_state), (macd, signal)
+
+    def update(self, close):
+        (self.fast.state, self.slow.state, self.signal.state), value = self.step(close)
+        return value
+
+    def peek(self, close):
+        return self.step(close)[1]
+
+
+# === State indikator per (symbol, interval) ===
+class IndicatorState:
+    def __init__(self, symbol, interval):
+        self.symbol = symbol
+        self.interval = interval
+        self.last_open_time = None
+        self.values = {}
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.last_open_time = None
+        self.values = {}
+        self.ema20 = StreamEMA(span=20, adjust=True)   # webhook.py: ewm(span=20)
+        self.ema50 = StreamEMA(span=50)
+        self.ema200 = StreamEMA(span=200)
+        self.rsi = StreamRSI(14)
+        self.bb = StreamBollinger(20, 2)
+        self.atr = StreamATR(14)
+        self.macd = StreamMACD(26, 12, 9)
+
+    def _compute(self, h, l, c, commit):
+        call = "update" if commit else "peek"
+        bb_h, bb_m, bb_l = getattr(self.bb, call)(c)
+        macd, macd_signal = getattr(self.macd, call)(c)
+        return {
+            "close": c,
+            "EMA20": getattr(self.ema20, call)(c),
+            "EMA50": getattr(self.ema50, call)(c),
+            "EMA200": getattr(self.ema200, call)(c),
+            "RSI": getattr(self.rsi, call)(c),
+            "BB_H": bb_h,
+            "BB_M": bb_m,
+            "BB_L": bb_l,
+            "ATR": getattr(self.atr, call)(h, l, c),
+            "MACD": macd,
+            "MACD_signal": macd_signal,
+        }
+
+    # Candle close: O(1) per candle
+    def update(self, open_time, high, low, close):
+        self.values = self._compute(high, low, close, commit=True)
+        self.last_open_time = open_time
+        return self.values
+
+    # Nilai sementara untuk candle yang masih berjalan (state tidak berubah)
+    def peek(self, high, low, close):
+        return self._compute(high, low, close, commit=False)
+
+    # Sinkronkan dengan window kline (baris terakhir = candle berjalan).
+    # Hanya candle close yang baru yang di-feed; bila ada celah, state dibangun ulang.
+    def sync(self, open_times, highs, lows, closes):
+        with self.lock:
+            n = len(closes)
+            if n == 0:
+                return dict(self.values)
+            step = INTERVAL_MS.get(self.interval)
+            start = 0
+            if self.last_open_time is not None:
+                start = n - 1
+                while start > 0 and open_times[start - 1] > self.last_open_time:
+                    start -= 1
+                if start < n - 1 and step and open_times[start] != self.last_open_time + step:
+                    self.reset()
+                    start = 0
+            for i in range(start, n - 1):
+                self.update(int(open_times[i]), float(highs[i]), float(lows[i]), float(closes[i]))
+            return self.peek(float(highs[-1]), float(lows[-1]), float(closes[-1]))
+
+    def sync_window(self, window):
+        return self.sync(window.open_time, window.high, window.low, window.close)
+
+    def sync_frame(self, df):
+        open_times = df.index.as_unit("ms").asi8
+        return self.sync(open_times, df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy())
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def indicator_state(symbol, interval):
+    key = (symbol, interval)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = IndicatorState(symbol, interval)
+        return state
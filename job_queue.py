@@ -0,0 +1,100 @@
+import os
+import time
+import queue
+import threading
+import traceback
+from collections import OrderedDict
+
+# === Konfigurasi antrean job ===
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_DEDUPE_SIZE = int(os.getenv("JOB_DEDUPE_SIZE", "5000"))
+
+
+# Antrean job in-process: webhook cukup submit lalu langsung balas,
+# worker pool yang menjalankan fetch, indikator, chart dan kirim Telegram.
+# job_id yang sama (mis. update_id Telegram yang dikirim ulang) hanya diproses sekali.
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, dedupe_size=JOB_DEDUPE_SIZE):
+        self.workers = workers
+        self.dedupe_size = dedupe_size
+        self._queue = queue.Queue()
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.started = 0
+        self.running = 0
+        self.wait_last = 0.0
+        self.wait_max = 0.0
+        self.wait_total = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, func, *args, job_id=None):
+        with self._lock:
+            if job_id is not None:
+                if job_id in self._seen:
+                    self.duplicates += 1
+                    return False
+                self._seen[job_id] = True
+                if len(self._seen) > self.dedupe_size:
+                    self._seen.popitem(last=False)
+            self.submitted += 1
+        self.start()
+        self._queue.put((time.monotonic(), func, args))
+        return True
+
+    def _worker(self):
+        while True:
+            enqueued_at, func, args = self._queue.get()
+            waited = time.monotonic() - enqueued_at
+            with self._lock:
+                self.started += 1
+                self.running += 1
+                self.wait_last = waited
+                self.wait_max = max(self.wait_max, waited)
+                self.wait_total += waited
+            try:
+                func(*args)
+                ok = True
+            except Exception:
+                ok = False
+                print(f"❌ Job {getattr(func, '__name__', func)} gagal:\n{traceback.format_exc()}")
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.processed += 1
+                    if not ok:
+                        self.failed += 1
+                self._queue.task_done()
+
+    def join(self):
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "running": self.running,
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "failed": self.failed,
+                "duplicates": self.duplicates,
+                "wait_last": round(self.wait_last, 4),
+                "wait_avg": round(self.wait_total / self.started, 4) if self.started else 0.0,
+                "wait_max": round(self.wait_max, 4),
+            }
+
+
+job_queue = JobQueue()
@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+
+# === Durasi tiap interval Binance (ms) ===
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "8h": 8 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+    "3d": 3 * 24 * 60 * 60_000,
+    "1w": 7 * 24 * 60 * 60_000,
+}
+
+# Batas umur entry (detik) untuk timeframe besar, 0 = hanya ikut penutupan candle
+KLINE_CACHE_MAX_AGE = float(os.getenv("KLINE_CACHE_MAX_AGE", "0"))
+
+
+def next_candle_close(interval, now=None):
+    # Waktu (epoch detik) saat candle `interval` yang sedang berjalan ditutup
+    step = INTERVAL_MS[interval]
+    now_ms = int((time.time() if now is None else now) * 1000)
+    return ((now_ms // step) + 1) * step / 1000.0
+
+
+# === Cache kline per proses ===
+# Key (symbol, interval, limit); entry kedaluwarsa saat candle berikutnya ditutup.
+# Limit lebih kecil dilayani dengan memotong window terbesar yang masih berlaku,
+# dan fetch paralel untuk pair yang sama digabung jadi satu round-trip.
+# Nilai yang disimpan adalah ohlcv.OHLCVWindow, jadi slicing berupa view tanpa salinan.
+class KlineCache:
+    def __init__(self, max_age=KLINE_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}   # (market, symbol, interval) -> {limit: (rows, expires_at)}
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+
+    def _lookup(self, key, limit, now):
+        windows = self._entries.get(key)
+        if not windows:
+            return None
+        best = None
+        for cached_limit, (rows, expires_at) in list(windows.items()):
+            if expires_at <= now:
+                del windows[cached_limit]
+                continue
+            if cached_limit >= limit and (best is None or cached_limit < best[0]):
+                best = (cached_limit, rows)
+        if not windows:
+            del self._entries[key]
+        if best is None:
+            return None
+        return best[1] if best[0] == limit else best[1][-limit:]
+
+    def get(self, symbol, interval, limit, fetch, market="spot"):
+        key = (market, symbol, interval)
+        with self._lock:
+            rows = self._lookup(key, limit, time.time())
+            if rows is not None:
+                self.hits += 1
+                return rows
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+
+        # Satu round-trip per (symbol, interval): request lain menunggu hasilnya
+        with fetch_lock:
+            with self._lock:
+                rows = self._lookup(key, limit, time.time())
+                if rows is not None:
+                    self.hits += 1
+                    return rows
+                self.misses += 1
+
+            rows = fetch(symbol, interval, limit)
+            if not rows:
+                return rows
+
+            now = time.time()
+            expires_at = next_candle_close(interval, now) if interval in INTERVAL_MS else now
+            if self.max_age:
+                expires_at = min(expires_at, now + self.max_age)
+            with self._lock:
+                self._entries.setdefault(key, {})[limit] = (rows, expires_at)
+            return rows
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": sum(len(w) for w in self._entries.values()),
+            }
+
+
+# Dipakai bersama oleh webhook.py dan chart_generator.py
+kline_cache = KlineCache()
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import fcntl
+import threading
+
+import numpy as np
+
+from kline_cache import INTERVAL_MS
+from ohlcv import OHLCVWindow, FIELDS
+
+# === Konfigurasi store ===
+KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "data/klines")
+KLINE_PAGE_LIMIT = 1000   # batas limit per request klines Binance
+
+# Satu record per candle close: open_time + OHLCV, 48 byte
+RECORD = np.dtype([("open_time", "<i8")] + [(name, "<f8") for name in FIELDS])
+
+
+def rows_to_arrays(rows):
+    times = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    values = np.array([r[1:6] for r in rows], dtype=np.float64).reshape(len(rows), len(FIELDS)).T
+    return times, values
+
+
+def merge_arrays(*parts):
+    # Gabung beberapa (times, values), urut per open-time; duplikat -> bagian terakhir yang menang
+    parts = [p for p in parts if len(p[0])]
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty((len(FIELDS), 0))
+    times = np.concatenate([p[0] for p in parts])
+    values = np.concatenate([p[1] for p in parts], axis=1)
+    order = np.argsort(times, kind="stable")
+    times, values = times[order], values[:, order]
+    last = np.r_[times[1:] != times[:-1], True]
+    return times[last], values[:, last]
+
+
+def download_range(fetch_page, symbol, interval, start_ms, end_ms, page_limit=KLINE_PAGE_LIMIT):
+    # Paging mundur (endTime) dari end_ms sampai start_ms, inklusif pada open-time.
+    # fetch_page(symbol, interval, limit, end_time) mengembalikan baris format REST.
+    pages = []
+    cursor = end_ms
+    while cursor >= start_ms:
+        rows = fetch_page(symbol, interval, page_limit, cursor)
+        rows = [r for r in rows or [] if start_ms <= r[0] <= cursor]
+        if not rows:
+            break
+        pages.append(rows_to_arrays(rows))
+        if len(rows) < page_limit:
+            break
+        cursor = rows[0][0] - 1
+    return merge_arrays(*reversed(pages))
+
+
+def last_closed_open_time(interval, now=None):
+    step = INTERVAL_MS[interval]
+    now_ms = int((time.time() if now is None else now) * 1000)
+    return (now_ms // step - 1) * step
+
+
+# === Store kline on-disk (memory-mapped) ===
+# Satu file append-only per (market, symbol, interval) berisi record RECORD yang
+# urut per open_time, hanya candle yang sudah close. Pembacaan lewat np.memmap:
+# range dicari dengan searchsorted di kolom open_time lalu dikembalikan sebagai
+# OHLCVWindow yang menunjuk langsung ke halaman file (zero-copy, read-only).
+# Saat append, celah antara candle tersimpan terakhir dan data baru diisi dulu
+# lewat REST sehingga file tetap kontinu. Penulisan dikunci flock, aman untuk
+# beberapa thread maupun proses (worker gunicorn) yang berbagi direktori.
+class KlineStore:
+    def __init__(self, directory=KLINE_STORE_DIR, market="spot", page_limit=KLINE_PAGE_LIMIT):
+        self.directory = os.path.join(directory, market)
+        self.page_limit = page_limit
+        self.appended = 0
+        self.gap_fills = 0
+        self._maps = {}     # (symbol, interval) -> (jumlah record, memmap)
+        self._lock = threading.Lock()
+
+    def path(self, symbol, interval):
+        return os.path.join(self.directory, f"{symbol.upper()}_{interval}.bin")
+
+    # --- Pembacaan ---
+    def records(self, symbol, interval):
+        path = self.path(symbol, interval)
+        try:
+            count = os.path.getsize(path) // RECORD.itemsize
+        except OSError:
+            count = 0
+        key = (symbol.upper(), interval)
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[0] == count:
+                return cached[1]
+            if count == 0:
+                mapped = np.empty(0, dtype=RECORD)
+            else:
+                # Map ulang hanya saat file bertambah; view lama tetap valid selama dipegang
+                mapped = np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+            self._maps[key] = (count, mapped)
+            return mapped
+
+    def count(self, symbol, interval):
+        return len(self.records(symbol, interval))
+
+    def last_time(self, symbol, interval):
+        rec = self.records(symbol, interval)
+        return int(rec["open_time"][-1]) if len(rec) else None
+
+    @staticmethod
+    def window(rec):
+        raw = rec.view(np.float64).reshape(len(rec), len(RECORD.names))
+        return OHLCVWindow.wrap(rec["open_time"], raw[:, 1:].T)
+
+    def read(self, symbol, interval, start_ms=None, end_ms=None):
+        rec = self.records(symbol, interval)
+        times = rec["open_time"]
+        lo = 0 if start_ms is None else int(np.searchsorted(times, start_ms, side="left"))
+        hi = len(rec) if end_ms is None else int(np.searchsorted(times, end_ms, side="right"))
+        return self.window(rec[lo:hi])
+
+    def tail(self, symbol, interval, n):
+        rec = self.records(symbol, interval)
+        return self.window(rec[max(0, len(rec) - n):])
+
+    def gaps(self, symbol, interval):
+        # Rentang open-time (dari, sampai) yang hilang di tengah file
+        times = self.records(symbol, interval)["open_time"]
+        step = INTERVAL_MS[interval]
+        idx = np.flatnonzero(np.diff(times) != step)
+        return [(int(times[i]) + step, int(times[i + 1]) - step) for i in idx]
+
+    # --- Metadata ---
+    def meta(self, symbol, interval):
+        try:
+            with open(self.path(symbol, interval) + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def set_meta(self, symbol, interval, **values):
+        meta = dict(self.meta(symbol, interval), **values)
+        tmp = self.path(symbol, interval) + ".json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.path(symbol, interval) + ".json")
+
+    # --- Penulisan ---
+    def _locked(self, symbol, interval):
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(self.path(symbol, interval) + ".lock", "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    @staticmethod
+    def _pack(times, values):
+        rec = np.empty(len(times), dtype=RECORD)
+        rec["open_time"] = times
+        for i, name in enumerate(FIELDS):
+            rec[name] = values[i]
+        return rec
+
+    def append(self, symbol, interval, times, values, fetch_page=None):
+        # Tambah candle close yang lebih baru dari record terakhir; celah diisi via fetch_page
+        if not len(times):
+            return 0
+        step = INTERVAL_MS[interval]
+        path = self.path(symbol, interval)
+        with self._locked(symbol, interval):
+            last = self.last_time(symbol, interval)
+            if last is not None:
+                keep = times > last
+                times, values = times[keep], values[:, keep]
+                if not len(times):
+                    return 0
+                if fetch_page is not None and times[0] > last + step:
+                    self.gap_fills += 1
+                    print(f"⚠️ Celah kline {symbol}-{interval} di store, isi via REST...")
+                    filler = download_range(fetch_page, symbol, interval, last + step, int(times[0]) - step, self.page_limit)
+                    times, values = merge_arrays(filler, (times, values))
+            with open(path, "ab") as f:
+                # Buang record parsial sisa crash sebelum menulis
+                f.truncate((f.tell() // RECORD.itemsize) * RECORD.itemsize)
+                f.write(self._pack(times, values).tobytes())
+            self.appended += len(times)
+            return len(times)
+
+    def rewrite(self, symbol, interval, times, values):
+        # Tulis ulang seluruh file (perluasan head / perbaikan celah); jarang dipakai
+        path = self.path(symbol, interval)
+        with self._locked(symbol, interval):
+            tmp = path + ".tmp"
+            self._pack(times, values).tofile(tmp)
+            os.replace(tmp, path)
+            with self._lock:
+                self._maps.pop((symbol.upper(), interval), None)
+
+    def repair(self, symbol, interval, fetch_page):
+        gaps = self.gaps(symbol, interval)
+        if not gaps:
+            return 0
+        rec = self.records(symbol, interval)
+        parts = [(np.array(rec["open_time"]), np.array(self.window(rec).column_block()))]
+        for start, end in gaps:
+            parts.append(download_range(fetch_page, symbol, interval, start, end, self.page_limit))
+        self.rewrite(symbol, interval, *merge_arrays(*parts))
+        return len(gaps)
+
+    # --- Jalur live ---
+    def live(self, symbol, interval, limit, fetch_page):
+        # `limit` candle terakhir (termasuk candle berjalan) dengan request REST sekecil mungkin:
+        # hanya candle close yang belum tersimpan + candle berjalan yang diambil
+        now_ms = int(time.time() * 1000)
+        rec = self.records(symbol, interval)
+        short = len(rec) < limit - 1   # satu slot untuk candle berjalan
+        if short:
+            n = limit
+        else:
+            last = int(rec["open_time"][-1])
+            n = max(1, (last_closed_open_time(interval) - last) // INTERVAL_MS[interval] + 1)
+        rows = fetch_page(symbol, interval, min(n, self.page_limit), None) or []
+        closed = [r for r in rows if int(r[6]) < now_ms]
+        running = [r for r in rows if int(r[6]) >= now_ms]
+        if closed:
+            times, values = rows_to_arrays(closed)
+            if short and len(rec) and times[0] < rec["open_time"][0]:
+                # Window baru menjangkau lebih jauh ke belakang dari isi file: gabung dan tulis ulang
+                stored = self.window(rec)
+                self.rewrite(symbol, interval, *merge_arrays((np.array(stored.open_time), np.array(stored.column_block())), (times, values)))
+            else:
+                self.append(symbol, interval, times, values, fetch_page=fetch_page)
+        stored = self.tail(symbol, interval, limit - len(running))
+        if not running:
+            return OHLCVWindow.from_arrays(np.array(stored.open_time), np.array(stored.column_block()))
+        times, values = merge_arrays((stored.open_time, stored.column_block()), rows_to_arrays(running))
+        return OHLCVWindow.from_arrays(times, values)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._maps),
+                "records": sum(c for c, _ in self._maps.values()),
+                "appended": self.appended,
+                "gap_fills": self.gap_fills,
+            }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def kline_store(market="spot"):
+    with _stores_lock:
+        store = _stores.get(market)
+        if store is None:
+            store = _stores[market] = KlineStore(market=market)
+        return store
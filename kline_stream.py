@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+import websocket
+
+from kline_cache import INTERVAL_MS
+
+# === Konfigurasi stream ===
+BINANCE_WS_URL = os.getenv("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+KLINE_STREAM_WINDOW = int(os.getenv("KLINE_STREAM_WINDOW", "1000"))
+STREAMS_PER_CONNECTION = 200
+RECONNECT_DELAY_MAX = 60
+# Backfill REST berjalan di worker terpisah agar thread WebSocket tetap membaca
+KLINE_BACKFILL_WORKERS = int(os.getenv("KLINE_BACKFILL_WORKERS", "2"))
+KLINE_BACKFILL_RETRY = float(os.getenv("KLINE_BACKFILL_RETRY", "5"))
+
+
+def kline_event_to_row(k):
+    # Event kline WebSocket -> format baris REST get_klines (12 kolom)
+    return [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"], k["q"], k["n"], k["V"], k["Q"], k.get("B", "0")]
+
+
+# === Ingest kline via combined stream WebSocket ===
+# Tiap (symbol, interval) punya ring buffer berukuran tetap (`window`).
+# Saat connect/reconnect atau ada celah open-time, stream masuk antrean backfill:
+# worker (maksimal `backfill_workers`) memanggil `rest_fetch(symbol, interval, limit)`
+# hanya untuk candle yang terlewat sejak open-time terakhir di buffer (window penuh
+# bila buffer masih kosong). Frame WebSocket yang datang selama menunggu ditahan,
+# lalu diterapkan setelah hasil REST digabung. get_klines() melayani pembacaan dari
+# memori dan mengembalikan None bila data belum siap, sehingga caller bisa
+# fallback ke REST.
+class KlineStream:
+    def __init__(self, symbols, intervals, rest_fetch, base_url=BINANCE_WS_URL, window=KLINE_STREAM_WINDOW,
+                 backfill_workers=KLINE_BACKFILL_WORKERS):
+        self.streams = [(s.upper(), i) for s in symbols for i in intervals]
+        self.rest_fetch = rest_fetch
+        self.base_url = base_url.rstrip("/")
+        self.window = window
+        self.buffers = {key: deque(maxlen=window) for key in self.streams}
+        self.ready = {key: False for key in self.streams}
+        self.backfill_workers = backfill_workers
+        self.messages = 0
+        self.backfills = 0
+        self.backfill_rows = 0
+        self.backfill_errors = 0
+        self.reconnects = 0
+        self._held = {}   # key -> frame yang ditahan selama backfill key itu antre/berjalan
+        self._backfill_queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._sockets = []
+
+    # --- Lifecycle ---
+    def start(self):
+        for n in range(self.backfill_workers):
+            t = threading.Thread(target=self._backfill_worker, name=f"kline-backfill-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        for n in range(0, len(self.streams), STREAMS_PER_CONNECTION):
+            chunk = self.streams[n:n + STREAMS_PER_CONNECTION]
+            t = threading.Thread(target=self._run, args=(chunk,), name=f"kline-ws-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for _ in range(self.backfill_workers):
+            self._backfill_queue.put(None)
+        for ws in list(self._sockets):
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _run(self, chunk):
+        names = "/".join(f"{s.lower()}@kline_{i}" for s, i in chunk)
+        url = f"{self.base_url}/stream?streams={names}"
+        delay = 1
+        while not self._stop.is_set():
+            ws = websocket.WebSocketApp(
+                url,
+                on_open=lambda ws: self._on_open(chunk),
+                on_message=lambda ws, msg: self._on_message(msg),
+                on_error=lambda ws, err: print(f"❌ Kline stream error: {err}"),
+            )
+            self._sockets.append(ws)
+            started = time.time()
+            ws.run_forever(ping_interval=60, ping_timeout=20)
+            self._sockets.remove(ws)
+
+            # Data di memori tidak lagi live sampai backfill berikutnya
+            with self._lock:
+                for key in chunk:
+                    self.ready[key] = False
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            delay = 1 if time.time() - started > RECONNECT_DELAY_MAX else min(delay * 2, RECONNECT_DELAY_MAX)
+            print(f"⚠️ Kline stream terputus, reconnect dalam {delay}s")
+            self._stop.wait(delay)
+
+    # --- Event handler ---
+    def _on_open(self, chunk):
+        with self._lock:
+            for key in chunk:
+                self._request_backfill(key)
+
+    def _on_message(self, message):
+        try:
+            payload = json.loads(message)
+            data = payload.get("data", payload)
+            if data.get("e") != "kline":
+                return
+            k = data["k"]
+            self.messages += 1
+            self.apply(data["s"], k["i"], kline_event_to_row(k))
+        except Exception as e:
+            print(f"❌ Gagal proses pesan kline: {e}")
+
+    def apply(self, symbol, interval, row):
+        key = (symbol, interval)
+        with self._lock:
+            if key not in self.buffers:
+                return
+            held = self._held.get(key)
+            if held is not None:
+                held.append(row)       # diterapkan setelah backfill selesai
+                return
+            if not self._append(key, row):
+                print(f"⚠️ Celah kline {symbol}-{interval}, backfill REST...")
+                self._request_backfill(key).append(row)
+
+    def _append(self, key, row):
+        # Terapkan satu baris ke buffer; False bila ada celah open-time (baris tidak dipakai)
+        buf = self.buffers[key]
+        if not buf:
+            buf.append(row)
+            return True
+        last_open = buf[-1][0]
+        if row[0] == last_open:
+            buf[-1] = row              # candle berjalan diperbarui
+            return True
+        if row[0] < last_open:
+            return True                # pesan telat, abaikan
+        step = INTERVAL_MS.get(key[1])
+        if step is not None and row[0] > last_open + step:
+            return False
+        buf.append(row)
+        return True
+
+    # --- Backfill ---
+    def _request_backfill(self, key):
+        # Dipanggil dengan _lock dipegang; satu entri antrean per key
+        self.ready[key] = False
+        held = self._held.get(key)
+        if held is None:
+            held = self._held[key] = deque(maxlen=self.window)
+            self._backfill_queue.put(key)
+        return held
+
+    def _backfill_limit(self, key):
+        # Candle sejak open-time terakhir di buffer sampai sekarang (+1 cadangan jam)
+        buf = self.buffers[key]
+        step = INTERVAL_MS.get(key[1])
+        if not buf or step is None:
+            return self.window
+        missed = int(time.time() * 1000 - buf[-1][0]) // step + 2
+        return max(2, min(missed, self.window))
+
+    def _backfill_worker(self):
+        while True:
+            key = self._backfill_queue.get()
+            if key is None or self._stop.is_set():
+                return
+            if not self.backfill(*key):
+                # Gagal: frame tetap ditahan dan key dicoba lagi setelah jeda
+                if self._stop.wait(KLINE_BACKFILL_RETRY):
+                    return
+                self._backfill_queue.put(key)
+
+    def backfill(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            limit = self._backfill_limit(key)
+        try:
+            rows = self.rest_fetch(symbol, interval, limit)
+        except Exception as e:
+            rows = None
+            print(f"❌ Backfill {symbol}-{interval} gagal: {e}")
+        with self._lock:
+            if not rows:
+                self.backfill_errors += 1
+                return False
+            buf = self.buffers[key]
+            step = INTERVAL_MS.get(interval)
+            # Hasil REST harus menyambung ke buffer; kalau tidak, buffer diisi ulang penuh
+            if limit < self.window and buf and step is not None and rows[0][0] > buf[-1][0] + step:
+                buf.clear()
+                self._backfill_queue.put(key)
+                return True
+            merged = {r[0]: r for r in buf} if limit < self.window else {}
+            merged.update((r[0], list(r)) for r in rows)
+            buf.clear()
+            buf.extend(merged[t] for t in sorted(merged)[-self.window:])
+            self.backfills += 1
+            self.backfill_rows += len(rows)
+            held = self._held.pop(key, ())
+            for i, row in enumerate(held):
+                if not self._append(key, row):
+                    # Celah baru sejak REST diambil: backfill lagi dengan sisa frame
+                    self._request_backfill(key).extend(list(held)[i:])
+                    return True
+            self.ready[key] = True
+        return True
+
+    # --- Pembacaan ---
+    def get_klines(self, symbol, interval, limit=500):
+        key = (symbol.upper(), interval)
+        with self._lock:
+            if not self.ready.get(key):
+                return None
+            buf = self.buffers[key]
+            if len(buf) < limit:
+                return None
+            return [list(r) for r in list(buf)[-limit:]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "streams": len(self.streams),
+                "ready": sum(1 for v in self.ready.values() if v),
+                "messages": self.messages,
+                "backfills": self.backfills,
+                "backfill_rows": self.backfill_rows,
+                "backfill_errors": self.backfill_errors,
+                "backfill_pending": len(self._held),
+                "reconnects": self.reconnects,
+            }
+
+
+# Stream aktif per proses (None bila tidak dijalankan)
+kline_stream = None
+
+
+def start_kline_stream(symbols, intervals, rest_fetch, base_url=BINANCE_WS_URL, window=KLINE_STREAM_WINDOW):
+    global kline_stream
+    if kline_stream is None:
+        kline_stream = KlineStream(symbols, intervals, rest_fetch, base_url=base_url, window=window).start()
+    return kline_stream
+
+
+def stream_klines(symbol, interval, limit):
+    return kline_stream.get_klines(symbol, interval, limit) if kline_stream else None
@@ -4,10 +4,11 @@ import os
 import time
 from analyzer import analyze_pair, generate_chart
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from state_backend import state_backend
 
 TOKEN = os.getenv("BOT_TOKEN")
 BOT = telegram.Bot(token=TOKEN)
-CHAT_COOLDOWN = {}  # {chat_id: last_request_time}
+CHAT_COOLDOWN = 60  # detik, per chat (di state bersama)
 
 app = Flask(__name__)
 
@@ -23,11 +24,14 @@ def webhook():
 
     # Rate limit 1 min per chat
     now = time.time()
-    if chat_id in CHAT_COOLDOWN and now - CHAT_COOLDOWN[chat_id] < 60:
+    cooldown_key = f"cooldown:{chat_id}"
+    if state_backend().get(cooldown_key) is not None:
         return 'cooldown'
 
     if text.endswith("USDT"):
-        CHAT_COOLDOWN[chat_id] = now
+        # add atomik: worker lain yang baru saja mengambil cooldown chat ini menang
+        if not state_backend().add(cooldown_key, now, ttl=CHAT_COOLDOWN):
+            return 'cooldown'
         
         try:
             result = analyze_pair(text)
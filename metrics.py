@@ -0,0 +1,190 @@
+import os
+import time
+import bisect
+import functools
+import threading
+import contextvars
+
+# === Konfigurasi metrik ===
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "bot")
+# Batas bucket histogram (detik): dari fetch yang kena cache sampai panggilan OpenAI
+METRICS_BUCKETS = tuple(
+    float(b) for b in os.getenv("METRICS_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30").split(",")
+)
+
+# Perintah yang sedang diproses (label `command`); ikut ke thread scan lewat contextvars
+_command = contextvars.ContextVar("metrics_command", default="none")
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=METRICS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}      # nilai label -> [count per bucket..., +Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for le, n in zip(self.buckets + (float("inf"),), series):
+                cumulative += n
+                bound = "+Inf" if le == float("inf") else repr(le)
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_values, value in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{base}}} {value}")
+        return lines
+
+
+stage_seconds = Histogram(f"{METRICS_PREFIX}_stage_duration_seconds",
+                          "Durasi tiap tahap (binance, indicators, render, openai, telegram, backtest).",
+                          ("stage", "command"))
+command_seconds = Histogram(f"{METRICS_PREFIX}_command_duration_seconds",
+                            "Durasi total pemrosesan satu perintah.", ("command",))
+stage_errors = Counter(f"{METRICS_PREFIX}_stage_errors_total",
+                       "Jumlah tahap yang berakhir dengan exception.", ("stage", "command"))
+
+_gauges = {}   # nama sumber -> fungsi yang mengembalikan dict stats()
+_gauges_lock = threading.Lock()
+
+
+# === Pengukuran ===
+# `with stage("binance"):` / `@timed("render")` mencatat durasi ke histogram dengan
+# label perintah aktif. Overhead per tahap hanya perf_counter + satu lock singkat.
+class stage:
+    __slots__ = ("name", "command", "started")
+
+    def __init__(self, name, command=None):
+        self.name = name
+        self.command = command
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        command = self.command or _command.get()
+        stage_seconds.observe(time.perf_counter() - self.started, self.name, command)
+        if exc_type is not None:
+            stage_errors.inc(self.name, command)
+        return False
+
+
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class command:
+    # Tandai perintah yang sedang diproses dan catat durasi totalnya; name=None -> tidak dicatat
+    __slots__ = ("name", "token", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if self.name is not None:
+            self.token = _command.set(self.name)
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.name is not None:
+            command_seconds.observe(time.perf_counter() - self.started, self.name)
+            _command.reset(self.token)
+        return False
+
+    def __call__(self, func):
+        # Dipakai sebagai dekorator: tiap panggilan func dihitung sebagai satu perintah
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with command(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def current_command():
+    return _command.get()
+
+
+def instrument(obj, name, *methods):
+    # Bungkus method objek pihak ketiga (mis. TeleBot.send_message) dengan stage(name)
+    for method in methods:
+        setattr(obj, method, timed(name)(getattr(obj, method)))
+    return obj
+
+
+# === Gauge dari stats() ===
+# Setiap nilai numerik dari fn() diekspos sebagai gauge <prefix>_<sumber>_<key>.
+def register_gauges(source, fn):
+    with _gauges_lock:
+        _gauges[source] = fn
+
+
+def _render_gauges():
+    lines = []
+    with _gauges_lock:
+        sources = list(_gauges.items())
+    for source, fn in sources:
+        try:
+            values = fn()
+        except Exception as e:
+            print(f"⚠️ Gagal ambil stats {source} untuk metrik: {e}")
+            continue
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{METRICS_PREFIX}_{source}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return lines
+
+
+# Teks format Prometheus (text exposition 0.0.4) untuk endpoint /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render():
+    lines = stage_seconds.render() + command_seconds.render() + stage_errors.render() + _render_gauges()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+# === Window OHLCV berbasis array NumPy ===
+# open_time disimpan sebagai int64 (ms), OHLCV sebagai blok float64 (5, capacity)
+# sehingga tiap kolom kontigu. Kapasitas = 2x maxlen: append amortized O(1),
+# eviksi hanya menggeser offset, dan data dipadatkan ulang saat buffer penuh.
+# Slicing (window[-100:]) dan properti kolom mengembalikan view tanpa salinan;
+# DataFrame baru dibuat lewat to_frame() bila pandas benar-benar diperlukan.
+# View bersifat read-only dan hanya valid selama window induknya tidak di-append.
+class OHLCVWindow:
+    __slots__ = ("maxlen", "_time", "_data", "_start", "_end", "_is_view")
+
+    def __init__(self, maxlen=1000, capacity=None):
+        self.maxlen = maxlen
+        capacity = capacity or 2 * maxlen
+        self._time = np.empty(capacity, dtype=np.int64)
+        self._data = np.empty((len(FIELDS), capacity), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self._is_view = False
+
+    @classmethod
+    def from_klines(cls, rows, maxlen=None):
+        # rows: format REST Binance [open_time, open, high, low, close, volume, ...]
+        n = max(len(rows), 1)
+        window = cls(maxlen=maxlen or n, capacity=max(n, maxlen or 0))
+        window.extend_klines(rows)
+        return window
+
+    @classmethod
+    def from_arrays(cls, open_time, ohlcv, maxlen=None):
+        # open_time: int64 (n,), ohlcv: float64 (5, n)
+        n = len(open_time)
+        window = cls(maxlen=maxlen or max(n, 1), capacity=max(n, maxlen or 0, 1))
+        keep = min(n, window.maxlen)
+        window._time[:keep] = open_time[n - keep:]
+        window._data[:, :keep] = ohlcv[:, n - keep:]
+        window._end = keep
+        return window
+
+    @classmethod
+    def wrap(cls, open_time, ohlcv):
+        # Bungkus array yang sudah ada (mis. memmap) tanpa salinan; hasilnya read-only
+        window = cls.__new__(cls)
+        window.maxlen = len(open_time)
+        window._time = open_time
+        window._data = ohlcv
+        window._start = 0
+        window._end = len(open_time)
+        window._is_view = True
+        return window
+
+    @classmethod
+    def _view(cls, parent, start, end):
+        window = cls.__new__(cls)
+        window.maxlen = end - start
+        window._time = parent._time
+        window._data = parent._data
+        window._start = start
+        window._end = end
+        window._is_view = True
+        return window
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step not in (None, 1):
+            raise TypeError("OHLCVWindow hanya mendukung slice berurutan")
+        start, end, _ = item.indices(len(self))
+        end = max(start, end)
+        return OHLCVWindow._view(self, self._start + start, self._start + end)
+
+    # --- Kolom (view zero-copy) ---
+    @property
+    def open_time(self):
+        return self._time[self._start:self._end]
+
+    def column(self, name):
+        return self._data[FIELDS.index(name), self._start:self._end]
+
+    def column_block(self):
+        return self._data[:, self._start:self._end]
+
+    open = property(lambda self: self.column("open"))
+    high = property(lambda self: self.column("high"))
+    low = property(lambda self: self.column("low"))
+    close = property(lambda self: self.column("close"))
+    volume = property(lambda self: self.column("volume"))
+
+    # --- Penambahan data ---
+    def _reserve(self, n):
+        capacity = self._time.shape[0]
+        if self._end + n <= capacity:
+            return
+        keep = len(self)
+        if keep + n > capacity:
+            capacity = max(2 * (keep + n), 2 * self.maxlen)
+            time_buf = np.empty(capacity, dtype=np.int64)
+            data_buf = np.empty((len(FIELDS), capacity), dtype=np.float64)
+        else:
+            time_buf, data_buf = self._time, self._data
+        time_buf[:keep] = self._time[self._start:self._end]
+        data_buf[:, :keep] = self._data[:, self._start:self._end]
+        self._time, self._data = time_buf, data_buf
+        self._start, self._end = 0, keep
+
+    def _evict(self):
+        if len(self) > self.maxlen:
+            self._start = self._end - self.maxlen
+
+    def append(self, open_time, open_, high, low, close, volume):
+        if self._is_view:
+            raise ValueError("View OHLCVWindow bersifat read-only")
+        # Candle yang sudah ada (mis. candle berjalan) ditimpa di tempat, yang lebih lama diabaikan
+        if len(self) and open_time <= self._time[self._end - 1]:
+            i = self._start + int(np.searchsorted(self.open_time, open_time))
+            if self._time[i] == open_time:
+                self._data[:, i] = (open_, high, low, close, volume)
+            return
+        self._reserve(1)
+        self._time[self._end] = open_time
+        self._data[:, self._end] = (open_, high, low, close, volume)
+        self._end += 1
+        self._evict()
+
+    def extend_klines(self, rows):
+        if self._is_view:
+            raise ValueError("View OHLCVWindow bersifat read-only")
+        if not rows:
+            return
+        times = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        values = np.array([r[1:6] for r in rows], dtype=np.float64).T
+        if len(self) and times[0] <= self._time[self._end - 1]:
+            for i in range(len(rows)):
+                self.append(times[i], *values[:, i])
+            return
+        n = len(rows)
+        self._reserve(n)
+        self._time[self._end:self._end + n] = times
+        self._data[:, self._end:self._end + n] = values
+        self._end += n
+        self._evict()
+
+    # --- Konversi ---
+    def to_frame(self):
+        index = pd.to_datetime(self.open_time, unit="ms")
+        index.name = "timestamp"
+        return pd.DataFrame({name: self.column(name) for name in FIELDS}, index=index, copy=True)
+
+    @property
+    def nbytes(self):
+        return self._time.nbytes + self._data.nbytes
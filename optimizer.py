@@ -0,0 +1,200 @@
+import os
+import sys
+import csv
+import time
+import random
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import ta
+
+from strategy import STRATEGY_DEFAULTS, prepare_arrays, evaluate_arrays
+import candle_patterns
+
+# === Konfigurasi sweep ===
+OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", "0")) or os.cpu_count()
+OPTIMIZER_OUTPUT = os.getenv("OPTIMIZER_OUTPUT", "")
+
+# Grid default; forward maksimal 10 (backtest_arrays menyisakan 10 bar di ujung data)
+SWEEP_GRID = {
+    "rsi_low": [20, 25, 30, 35],
+    "rsi_high": [65, 70, 75, 80],
+    "bb_window": [14, 20, 26],
+    "bb_dev": [1.5, 2, 2.5],
+    "ema_span": [10, 20, 50],
+    "rr": [1.0, 1.5, 2.0, 3.0],
+    "forward": [3, 5, 10],
+}
+# Parameter yang menentukan indikator; kombinasi dengan nilai sama dievaluasi dalam satu task
+INDICATOR_KEYS = ("bb_window", "bb_dev", "ema_span", "forward")
+FIELDS = ("open", "high", "low", "close")
+
+
+def parameter_grid(grid=SWEEP_GRID, samples=None, seed=0):
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if samples and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+# === Harga di shared memory ===
+# Semua simbol disalin sekali ke satu blok float64 (simbol, OHLC, bar), rata kiri;
+# `lengths` menyimpan jumlah bar tiap simbol. Worker hanya memegang view ke blok ini.
+def share_prices(windows):
+    symbols = list(windows)
+    lengths = [len(windows[s]) for s in symbols]
+    shape = (len(symbols), len(FIELDS), max(lengths))
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for k, s in enumerate(symbols):
+        for j, name in enumerate(FIELDS):
+            prices[k, j, :lengths[k]] = windows[s].column(name)
+    return shm, (shm.name, shape, lengths, symbols)
+
+
+_shm = None
+_prices = None
+_lengths = None
+_patterns = {}
+_indicator_cache = {}
+
+
+def _attach(name, shape, lengths, symbols):
+    global _shm, _prices, _lengths
+    _shm = shared_memory.SharedMemory(name=name)
+    _prices = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _lengths = lengths
+    _patterns.clear()
+    _indicator_cache.clear()
+
+
+def _arrays(k):
+    n = _lengths[k]
+    return tuple(_prices[k, j, :n] for j in range(len(FIELDS)))
+
+
+def _indicators(k, bb_window, bb_dev, ema_span):
+    key = (k, bb_window, bb_dev, ema_span)
+    cached = _indicator_cache.get(key)
+    if cached is None:
+        close = pd.Series(_arrays(k)[3])
+        bb = ta.volatility.BollingerBands(close, window=bb_window, window_dev=bb_dev)
+        rsi = _indicator_cache.get((k, "rsi"))
+        if rsi is None:
+            rsi = _indicator_cache[(k, "rsi")] = ta.momentum.RSIIndicator(close, window=14).rsi().to_numpy()
+        cached = _indicator_cache[key] = (
+            close.ewm(span=ema_span).mean().to_numpy(),
+            rsi,
+            bb.bollinger_hband().to_numpy(),
+            bb.bollinger_lband().to_numpy(),
+        )
+    return cached
+
+
+def _evaluate_group(combos):
+    # Semua combo di sini berbagi INDICATOR_KEYS yang sama
+    first = combos[0]
+    totals = [[0, 0] for _ in combos]   # [trade, win] per combo
+    for k in range(len(_lengths)):
+        o, h, l, c = _arrays(k)
+        if k not in _patterns:
+            _patterns[k] = candle_patterns.scan(o, h, l, c)
+        ema, rsi, bb_h, bb_l = _indicators(k, first["bb_window"], first["bb_dev"], first["ema_span"])
+        prep = prepare_arrays(o, h, l, c, ema, forward=first["forward"], patterns=_patterns[k])
+        for t, p in zip(totals, combos):
+            idx, win = evaluate_arrays(prep, rsi, bb_h, bb_l, rsi_low=p["rsi_low"], rsi_high=p["rsi_high"], rr=p["rr"])
+            t[0] += len(idx)
+            t[1] += int(win.sum())
+    return [(p, trades, wins) for p, (trades, wins) in zip(combos, totals)]
+
+
+def summarize(params, trades, wins):
+    losses = trades - wins
+    return dict(
+        params,
+        trades=trades,
+        wins=wins,
+        losses=losses,
+        win_rate=round(wins / trades * 100, 2) if trades else 0.0,
+        profit_factor=round(wins * params["rr"] / losses, 3) if losses else (float("inf") if wins else 0.0),
+    )
+
+
+# === Sweep paralel ===
+# Kombinasi dikelompokkan per parameter indikator lalu dibagi ke ProcessPoolExecutor
+# (default semua core). Hasil diurutkan per profit factor lalu win rate.
+def sweep(windows, combos, workers=None, min_trades=1):
+    groups = {}
+    for p in combos:
+        groups.setdefault(tuple(p[k] for k in INDICATOR_KEYS), []).append(p)
+
+    shm, meta = share_prices(windows)
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or OPTIMIZER_WORKERS, initializer=_attach, initargs=meta) as pool:
+            futures = [pool.submit(_evaluate_group, group) for group in groups.values()]
+            for n, fut in enumerate(as_completed(futures), 1):
+                results.extend(summarize(*r) for r in fut.result())
+                print(f"⏳ {n}/{len(futures)} grup indikator selesai", end="\r", flush=True)
+    finally:
+        shm.close()
+        shm.unlink()
+    print()
+    results = [r for r in results if r["trades"] >= min_trades]
+    return sorted(results, key=lambda r: (r["profit_factor"], r["win_rate"], r["trades"]), reverse=True)
+
+
+def load_windows(symbols, interval="1m", days=30):
+    from webhook import history
+    windows = {}
+    for symbol in symbols:
+        try:
+            window = history.load(symbol, interval, days=days)
+        except Exception as e:
+            print(f"❌ Gagal load histori {symbol}: {e}")
+            continue
+        if len(window) >= 100:
+            windows[symbol] = window
+    return windows
+
+
+def format_results(results, top=20):
+    keys = list(SWEEP_GRID)
+    lines = [" | ".join(keys + ["trades", "win%", "PF"])]
+    for r in results[:top]:
+        lines.append(" | ".join([str(r[k]) for k in keys] + [str(r["trades"]), f"{r['win_rate']}", f"{r['profit_factor']}"]))
+    return "\n".join(lines)
+
+
+# Jalankan: python optimizer.py [jumlah_sampel (0 = grid penuh)] [hari_histori]
+def main():
+    from webhook import POPULAR_SYMBOLS
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    combos = parameter_grid(samples=samples or None)
+    windows = load_windows(POPULAR_SYMBOLS, days=days)
+    if not windows:
+        print("⚠️ Tidak ada data histori untuk sweep.")
+        return
+
+    bars = sum(len(w) for w in windows.values())
+    print(f"🧪 Sweep {len(combos)} kombinasi x {len(windows)} simbol ({bars} bar) di {OPTIMIZER_WORKERS} proses...")
+    started = time.time()
+    results = sweep(windows, combos, min_trades=10)
+    print(f"✅ Selesai dalam {time.time() - started:.1f}s (default: {STRATEGY_DEFAULTS})")
+    print(format_results(results))
+
+    if OPTIMIZER_OUTPUT:
+        with open(OPTIMIZER_OUTPUT, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else list(SWEEP_GRID))
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"💾 Hasil lengkap disimpan ke {OPTIMIZER_OUTPUT}")
+
+
+if __name__ == "__main__":
+    main()
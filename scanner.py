@@ -0,0 +1,59 @@
+import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# === Konfigurasi scan paralel ===
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "8"))
+SCAN_TIMEOUT = float(os.getenv("SCAN_TIMEOUT", "20"))
+
+
+def _outcome(fut):
+    try:
+        return fut.result(), None
+    except Exception as e:
+        return None, e
+
+
+# Jalankan func(symbol) untuk banyak simbol lewat worker pool terbatas.
+# Hasil di-yield sesuai urutan selesai sebagai (symbol, result, error);
+# simbol yang masih berjalan lebih dari `timeout` detik di-yield dengan TimeoutError
+# (hasil yang sudah selesai tetap dikirim walau pemanggil lama memprosesnya).
+# Context (mis. label perintah untuk metrik) pemanggil ikut ke thread worker.
+def scan_symbols(func, symbols, concurrency=None, timeout=None):
+    symbols = list(symbols)
+    if not symbols:
+        return
+    concurrency = concurrency or SCAN_CONCURRENCY
+    timeout = SCAN_TIMEOUT if timeout is None else timeout
+
+    started = {}
+
+    def run(i, symbol):
+        started[i] = time.monotonic()
+        return func(symbol)
+
+    executor = ThreadPoolExecutor(max_workers=min(concurrency, len(symbols)), thread_name_prefix="scan")
+    pending = {executor.submit(contextvars.copy_context().run, run, i, s): (i, s) for i, s in enumerate(symbols)}
+    try:
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[i] + timeout for i, _ in pending.values() if i in started]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else timeout
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                _, symbol = pending.pop(fut)
+                yield (symbol,) + _outcome(fut)
+
+            # Waktu habis hanya untuk future yang belum selesai; yang selesai selama
+            # pemanggil memproses yield sebelumnya tetap dikirim sebagai hasil
+            for fut, (i, symbol) in list(pending.items()):
+                if fut.done():
+                    del pending[fut]
+                    yield (symbol,) + _outcome(fut)
+                elif i in started and time.monotonic() - started[i] >= timeout:
+                    del pending[fut]
+                    yield symbol, None, TimeoutError(f"{symbol} melebihi {timeout:.0f}s")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
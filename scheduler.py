@@ -0,0 +1,151 @@
+import os
+import time
+import threading
+
+from kline_cache import INTERVAL_MS, next_candle_close
+from scanner import scan_symbols
+
+# === Konfigurasi scheduler ===
+SCHEDULE_RATE = float(os.getenv("SCHEDULE_RATE", "10"))            # simbol per detik (0 = tanpa batas)
+SCHEDULE_CONCURRENCY = int(os.getenv("SCHEDULE_CONCURRENCY", "8"))
+SCHEDULE_SETTLE = float(os.getenv("SCHEDULE_SETTLE", "1.5"))       # jeda setelah close agar candle final tersedia
+SCHEDULE_RETRIES = int(os.getenv("SCHEDULE_RETRIES", "3"))
+SCHEDULE_RETRY_DELAY = float(os.getenv("SCHEDULE_RETRY_DELAY", "2"))
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# === Scheduler yang selaras dengan close candle ===
+# Bangun tepat setelah candle interval terkecil yang dijadwalkan close, lalu cek
+# tiap simbol: `last_closed(symbol, interval)` memberi open-time candle close
+# terakhir. Simbol yang candle barunya belum tersedia dicoba ulang beberapa kali,
+# simbol yang datanya tidak berubah sejak evaluasi terakhir dilewati, sisanya
+# dijalankan `evaluate(symbol)` dengan laju dibatasi `rate` simbol/detik.
+# Lag (detik sejak candle close sampai evaluasi selesai) dicatat per simbol.
+class CandleScheduler:
+    def __init__(self, symbols, intervals, last_closed, evaluate, rate=SCHEDULE_RATE,
+                 concurrency=SCHEDULE_CONCURRENCY, settle=SCHEDULE_SETTLE, retries=SCHEDULE_RETRIES,
+                 retry_delay=SCHEDULE_RETRY_DELAY):
+        self.symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        self.intervals = sorted(intervals, key=INTERVAL_MS.__getitem__)
+        self.last_closed = last_closed
+        self.evaluate = evaluate
+        self.rate = rate
+        self.concurrency = concurrency
+        self.settle = settle
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.cycles = 0
+        self.lags = {}          # symbol -> lag evaluasi terakhir (detik)
+        self.last_cycle = {}
+        self._seen = {}         # (symbol, interval) -> open-time candle yang sudah dievaluasi
+        self._next_slot = 0.0
+        self._pace_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _pace(self):
+        if self.rate <= 0:
+            return
+        with self._pace_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def closed_intervals(self, boundary):
+        boundary_ms = int(round(boundary * 1000))
+        return [iv for iv in self.intervals if boundary_ms % INTERVAL_MS[iv] == 0]
+
+    def _check(self, symbol, interval, expected, boundary):
+        self._pace()
+        last = self.last_closed(symbol, interval)
+        if last is None or last < expected:
+            return "late"
+        key = (symbol, interval)
+        if self._seen.get(key) == last:
+            return "unchanged"
+        self.evaluate(symbol)
+        self._seen[key] = last
+        lag = time.time() - boundary
+        self.lags[symbol] = lag
+        return lag
+
+    def run_cycle(self, boundary):
+        closed = self.closed_intervals(boundary)
+        if not closed:
+            return None
+        interval = closed[0]
+        expected = int(round(boundary * 1000)) - INTERVAL_MS[interval]
+        pending = self.symbols
+        lags, unchanged, failed = [], 0, 0
+
+        for attempt in range(self.retries + 1):
+            late = []
+            check = lambda s: self._check(s, interval, expected, boundary)
+            for symbol, result, error in scan_symbols(check, pending, concurrency=self.concurrency):
+                if error is not None:
+                    failed += 1
+                    print(f"❌ Evaluasi {symbol} gagal: {error}")
+                elif result == "late":
+                    late.append(symbol)
+                elif result == "unchanged":
+                    unchanged += 1
+                else:
+                    lags.append(result)
+            if not late or attempt == self.retries or self._stop.wait(self.retry_delay):
+                break
+            pending = late
+
+        self.cycles += 1
+        self.last_cycle = {
+            "boundary": boundary,
+            "intervals": closed,
+            "symbols": len(self.symbols),
+            "evaluated": len(lags),
+            "unchanged": unchanged,
+            "late": len(late),   # candle belum tersedia sampai retry terakhir
+            "failed": failed,
+            "lag_p50": round(percentile(lags, 0.5), 3),
+            "lag_p95": round(percentile(lags, 0.95), 3),
+            "lag_max": round(max(lags), 3) if lags else 0.0,
+        }
+        c = self.last_cycle
+        print(
+            f"🕒 Close {'/'.join(closed)} {time.strftime('%H:%M', time.gmtime(boundary))} UTC: "
+            f"{c['evaluated']} dievaluasi, {c['unchanged']} tanpa data baru, "
+            f"{c['late']} terlambat, {c['failed']} gagal, "
+            f"lag p50 {c['lag_p50']:.2f}s / p95 {c['lag_p95']:.2f}s / max {c['lag_max']:.2f}s"
+        )
+        return self.last_cycle
+
+    # --- Loop utama ---
+    def run(self):
+        while not self._stop.is_set():
+            boundary = min(next_candle_close(iv) for iv in self.intervals)
+            if self._stop.wait(max(0.0, boundary + self.settle - time.time())):
+                break
+            try:
+                self.run_cycle(boundary)
+            except Exception as e:
+                print(f"❌ Siklus scheduler gagal: {e}")
+
+    def start(self):
+        threading.Thread(target=self.run, name="candle-scheduler", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "symbols": len(self.symbols),
+            "intervals": self.intervals,
+            "cycles": self.cycles,
+            "last_cycle": self.last_cycle,
+        }
@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+import time
+import threading
+import importlib
+import traceback
+
+
+def process_started_at():
+    # Waktu start proses dari /proc (termasuk start interpreter); fallback: sekarang
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            btime = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return btime + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, StopIteration):
+        return time.time()
+
+
+PROCESS_STARTED_AT = process_started_at()
+
+# === Konfigurasi start cepat ===
+SERVE_APP = os.getenv("SERVE_APP", "webhook:app")
+# Path webhook yang di-buffer selama app utama masih dimuat (dijawab 200 agar Telegram tidak retry)
+SERVE_BUFFER_PATHS = [p.strip() for p in os.getenv("SERVE_BUFFER_PATHS", "/webhook").split(",") if p.strip()]
+SERVE_BUFFER_LIMIT = int(os.getenv("SERVE_BUFFER_LIMIT", "1000"))
+# Bila app gagal dimuat: keluar agar platform me-restart dyno (0 = tetap hidup dan jawab 503)
+SERVE_EXIT_ON_ERROR = os.getenv("SERVE_EXIT_ON_ERROR", "1") == "1"
+
+
+# === Boot cepat untuk dyno web ===
+# Port dibuka dulu oleh WSGI kecil ini (hanya werkzeug), baru app utama beserta
+# pandas/matplotlib/ta/binance di-import di thread background. Selama memuat,
+# POST ke SERVE_BUFFER_PATHS disimpan dan langsung dijawab 200; setelah app siap
+# request tersebut diputar ulang berurutan lewat app sebelum request baru diteruskan.
+# /health melaporkan status dan waktu: port terbuka, respons pertama, app siap.
+class Boot:
+    def __init__(self, target=SERVE_APP, buffer_paths=SERVE_BUFFER_PATHS, buffer_limit=SERVE_BUFFER_LIMIT):
+        self.target = target
+        self.buffer_paths = set(buffer_paths)
+        self.buffer_limit = buffer_limit
+        self.app = None
+        self.module = None
+        self.error = None
+        self.pending = []
+        self.replayed = 0
+        self.dropped = 0
+        self.bound_at = None
+        self.first_response_at = None
+        self.ready_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        module_name, _, attr = self.target.partition(":")
+        try:
+            module = importlib.import_module(module_name)
+            app = getattr(module, attr or "app")
+        except Exception:
+            with self._lock:
+                self.error = traceback.format_exc()
+                lost = len(self.pending)
+                self.pending = []
+            print(f"❌ Gagal memuat {self.target} ({lost} update ter-buffer hilang):\n{self.error}")
+            if SERVE_EXIT_ON_ERROR:
+                sys.stdout.flush()
+                os._exit(1)
+            return
+
+        with self._lock:
+            client = app.test_client()
+            for path, body, content_type in self.pending:
+                try:
+                    client.post(path, data=body, content_type=content_type)
+                    self.replayed += 1
+                except Exception as e:
+                    print(f"❌ Replay {path} gagal: {e}")
+            self.pending = []
+            self.module = module
+            self.app = app
+            self.ready_at = time.time()
+        print(f"🚀 {self.target} siap {self.ready_at - PROCESS_STARTED_AT:.2f}s setelah start proses "
+              f"(port terbuka {self.bound_at - PROCESS_STARTED_AT:.2f}s, {self.replayed} request di-replay)")
+
+        # Pemanasan opsional setelah siap (mis. template chart), tidak menahan request
+        warmup = getattr(module, "warmup", None)
+        if callable(warmup):
+            try:
+                started = time.time()
+                warmup()
+                print(f"🔥 Warmup {module_name} selesai dalam {time.time() - started:.2f}s")
+            except Exception as e:
+                print(f"⚠️ Warmup {module_name} gagal: {e}")
+
+    def start(self):
+        threading.Thread(target=self.load, name="boot-load", daemon=True).start()
+
+    def _since_start(self, at):
+        return round(at - PROCESS_STARTED_AT, 3) if at else None
+
+    def health(self):
+        return {
+            "ready": self.app is not None,
+            "app": self.target,
+            "error": self.error.strip().splitlines()[-1] if self.error else None,
+            "port_bound_after": self._since_start(self.bound_at),
+            "first_response_after": self._since_start(self.first_response_at),
+            "ready_after": self._since_start(self.ready_at),
+            "buffered": len(self.pending),
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+        }
+
+    def _respond(self, start_response, status, body, content_type="text/plain", headers=()):
+        if self.first_response_at is None:
+            self.first_response_at = time.time()
+            print(f"⚡ Respons pertama {self.first_response_at - PROCESS_STARTED_AT:.2f}s setelah start proses")
+        start_response(status, [("Content-Type", content_type), ("Content-Length", str(len(body)))] + list(headers))
+        return [body]
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path == "/health":
+            info = self.health()
+            status = "200 OK" if info["ready"] else "503 Service Unavailable"
+            return self._respond(start_response, status, json.dumps(info).encode(), "application/json")
+
+        app = self.app
+        if app is None:
+            with self._lock:
+                app = self.app
+                if self.error is not None:
+                    # Jangan terima update lagi: 5xx membuat Telegram mengirim ulang nanti
+                    return self._respond(start_response, "503 Service Unavailable", b"app failed to load")
+                if app is None and environ.get("REQUEST_METHOD") == "POST" and path in self.buffer_paths:
+                    if len(self.pending) >= self.buffer_limit:
+                        self.dropped += 1
+                        return self._respond(start_response, "503 Service Unavailable", b"warming up", headers=[("Retry-After", "1")])
+                    length = int(environ.get("CONTENT_LENGTH") or 0)
+                    body = environ["wsgi.input"].read(length) if length else b""
+                    self.pending.append((path, body, environ.get("CONTENT_TYPE", "application/json")))
+                    return self._respond(start_response, "200 OK", b"OK")
+            if app is None:
+                return self._respond(start_response, "503 Service Unavailable", b"warming up", headers=[("Retry-After", "1")])
+
+        if self.first_response_at is None:
+            self.first_response_at = time.time()
+        return app(environ, start_response)
+
+
+# Jalankan: python serve.py [modul:app]   (Procfile: web: python serve.py)
+def main():
+    from werkzeug.serving import make_server
+
+    boot = Boot(sys.argv[1] if len(sys.argv) > 1 else SERVE_APP)
+    port = int(os.getenv("PORT", 5000))
+    server = make_server("0.0.0.0", port, boot, threaded=True)
+    boot.bound_at = time.time()
+    print(f"🔌 Port {port} terbuka {boot.bound_at - PROCESS_STARTED_AT:.2f}s setelah start proses, memuat {boot.target}...")
+    boot.start()
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# === Konfigurasi state bersama ===
+# memory: dict per proses (satu worker); sqlite: satu file WAL yang dipakai bersama
+# oleh semua worker/proses di mesin yang sama
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_PATH = os.getenv("STATE_PATH", "data/state.sqlite3")
+# Entry kedaluwarsa dibuang tiap sekian penulisan (selain diabaikan saat dibaca)
+STATE_SWEEP_EVERY = int(os.getenv("STATE_SWEEP_EVERY", "1000"))
+STATE_BUSY_TIMEOUT = float(os.getenv("STATE_BUSY_TIMEOUT", "5"))
+
+
+def _expires(ttl, now):
+    return now + ttl if ttl else None
+
+
+# === Backend in-process ===
+# key -> (value, expires); get/set O(1), entry kedaluwarsa dianggap tidak ada.
+class MemoryState:
+    def __init__(self, sweep_every=STATE_SWEEP_EVERY):
+        self.sweep_every = sweep_every
+        self.writes = 0
+        self.expired = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            self.expired += 1
+            return None
+        return entry
+
+    def _write(self, key, value, ttl, now):
+        self._data[key] = (value, _expires(ttl, now))
+        self.writes += 1
+        if self.writes % self.sweep_every == 0:
+            dead = [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]
+            for k in dead:
+                del self._data[k]
+            self.expired += len(dead)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return entry[0] if entry else default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._write(key, value, ttl, time.time())
+
+    def add(self, key, value, ttl=None):
+        # Simpan hanya bila key belum ada (atau sudah kedaluwarsa); True bila tersimpan
+        with self._lock:
+            now = time.time()
+            if self._live(key, now) is not None:
+                return False
+            self._write(key, value, ttl, now)
+            return True
+
+    def swap(self, key, value, ttl=None):
+        # Simpan value dan kembalikan value sebelumnya (None bila belum ada)
+        with self._lock:
+            now = time.time()
+            entry = self._live(key, now)
+            self._write(key, value, ttl, now)
+            return entry[0] if entry else None
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "writes": self.writes, "expired": self.expired}
+
+
+# === Backend SQLite (WAL) ===
+# Satu tabel key/value/expires di file bersama. WAL membuat pembaca tidak menunggu
+# penulis; add/swap dijalankan dalam satu transaksi IMMEDIATE sehingga atomik antar
+# proses (dua worker yang menerima update sama tidak sama-sama lolos cooldown).
+# Value disimpan sebagai JSON; koneksi dibuka per thread.
+class SQLiteState:
+    def __init__(self, path=STATE_PATH, sweep_every=STATE_SWEEP_EVERY, busy_timeout=STATE_BUSY_TIMEOUT):
+        self.path = path
+        self.sweep_every = sweep_every
+        self.busy_timeout = busy_timeout
+        self.writes = 0
+        self.expired = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+                " WITHOUT ROWID"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _after_write(self, conn, now):
+        with self._lock:
+            self.writes += 1
+            sweep = self.writes % self.sweep_every == 0
+        if sweep:
+            deleted = conn.execute("DELETE FROM state WHERE expires IS NOT NULL AND expires <= ?", (now,)).rowcount
+            with self._lock:
+                self.expired += deleted
+
+    def get(self, key, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value, ttl=None):
+        conn, now = self._conn(), time.time()
+        conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?)", (key, json.dumps(value), _expires(ttl, now)))
+        self._after_write(conn, now)
+
+    def add(self, key, value, ttl=None):
+        conn, now = self._conn(), time.time()
+        # Upsert yang hanya menimpa entry kedaluwarsa: satu statement, jadi atomik
+        added = conn.execute(
+            "INSERT INTO state VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE"
+            " SET value = excluded.value, expires = excluded.expires"
+            " WHERE state.expires IS NOT NULL AND state.expires <= ?",
+            (key, json.dumps(value), _expires(ttl, now), now),
+        ).rowcount == 1
+        if added:
+            self._after_write(conn, now)
+        return added
+
+    def swap(self, key, value, ttl=None):
+        conn, now = self._conn(), time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM state WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, now)
+            ).fetchone()
+            conn.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?)", (key, json.dumps(value), _expires(ttl, now)))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_write(conn, now)
+        return json.loads(row[0]) if row else None
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def stats(self):
+        entries = self._conn().execute("SELECT COUNT(*) FROM state").fetchone()[0]
+        with self._lock:
+            return {"entries": entries, "writes": self.writes, "expired": self.expired}
+
+
+BACKENDS = {"memory": MemoryState, "sqlite": SQLiteState}
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def state_backend():
+    # Backend bersama untuk proses ini, dipilih lewat STATE_BACKEND saat pertama dipakai
+    global _state
+    with _state_lock:
+        if _state is None:
+            if STATE_BACKEND not in BACKENDS:
+                raise ValueError(f"STATE_BACKEND tidak dikenal: {STATE_BACKEND} (pilihan: {', '.join(BACKENDS)})")
+            _state = BACKENDS[STATE_BACKEND]()
+        return _state
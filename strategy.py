@@ -0,0 +1,74 @@
+import numpy as np
+
+import candle_patterns
+from candle_patterns import LONG_PATTERNS, SHORT_PATTERNS
+
+# Parameter default strategi reversal (sama dengan backtest_strategy / analyze_multi_timeframe)
+STRATEGY_DEFAULTS = {
+    "rsi_low": 30,
+    "rsi_high": 70,
+    "bb_window": 20,
+    "bb_dev": 2,
+    "ema_span": 20,
+    "rr": 2.0,
+    "forward": 5,
+}
+
+
+# === Kernel backtest array ===
+# Semua kondisi dihitung sekaligus per array. prepare_arrays menghitung bagian yang
+# tidak bergantung pada threshold (trend, bitmask pola candle, high/low ke depan) dan hanya
+# menyimpan bar yang punya pola reversal; evaluate_arrays menerapkan threshold RSI
+# dan TP (rr). Saat sweep, satu prepare dipakai untuk banyak kombinasi threshold.
+# Return (index bar entry, mask WIN) untuk trade yang kena TP atau SL dalam `forward` bar.
+def prepare_arrays(o, h, l, c, ema, forward=5, patterns=None):
+    n = len(c)
+    idx = np.arange(30, n - 10)
+    if idx.size == 0:
+        return None
+
+    bits = candle_patterns.reversal_pattern((candle_patterns.scan(o, h, l, c) if patterns is None else patterns)[idx])
+    long_pattern = (bits & LONG_PATTERNS) != 0
+    short_pattern = (bits & SHORT_PATTERNS) != 0
+    keep = long_pattern | short_pattern
+    idx = idx[keep]
+
+    # Trend: rata-rata close vs EMA pada 5 bar sebelum i
+    windows = np.lib.stride_tricks.sliding_window_view
+    trend_up = windows(c, 5)[idx - 5].mean(axis=1) > windows(ema, 5)[idx - 5].mean(axis=1)
+
+    return {
+        "idx": idx,
+        "long": trend_up & long_pattern[keep],
+        "short": ~trend_up & short_pattern[keep],
+        "entry": c[idx],
+        "low": l[idx],
+        "high": h[idx],
+        # Resolusi TP/SL pada `forward` bar berikutnya
+        "future_high": windows(h, forward)[idx + 1].max(axis=1),
+        "future_low": windows(l, forward)[idx + 1].min(axis=1),
+    }
+
+
+def evaluate_arrays(prep, rsi, bb_h, bb_l, rsi_low=30, rsi_high=70, rr=2.0):
+    if prep is None:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    idx, entry = prep["idx"], prep["entry"]
+    is_long = prep["long"] & (rsi[idx] < rsi_low) & (entry < bb_l[idx])
+    is_short = prep["short"] & (rsi[idx] > rsi_high) & (entry > bb_h[idx])
+
+    long_sl = prep["low"]
+    long_tp = entry + (entry - long_sl) * rr
+    short_sl = prep["high"]
+    short_tp = entry - (short_sl - entry) * rr
+    future_high, future_low = prep["future_high"], prep["future_low"]
+
+    win = (is_long & (future_high >= long_tp)) | (is_short & (future_low <= short_tp))
+    loss = ~win & ((is_long & (future_low <= long_sl)) | (is_short & (future_high >= short_sl)))
+    traded = win | loss
+    return idx[traded], win[traded]
+
+
+def backtest_arrays(o, h, l, c, ema, rsi, bb_h, bb_l, rsi_low=30, rsi_high=70, rr=2.0, forward=5, patterns=None):
+    prep = prepare_arrays(o, h, l, c, ema, forward=forward, patterns=patterns)
+    return evaluate_arrays(prep, rsi, bb_h, bb_l, rsi_low=rsi_low, rsi_high=rsi_high, rr=rr)
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+
+# === Konfigurasi registry simbol ===
+SYMBOL_REFRESH_SECONDS = int(os.getenv("SYMBOL_REFRESH_SECONDS", "3600"))
+SYMBOL_RETRY_SECONDS = 30
+
+
+def symbol_info(s):
+    # Ringkas entri exchangeInfo menjadi metadata yang dipakai bot
+    filters = {f["filterType"]: f for f in s.get("filters", [])}
+    return {
+        "symbol": s["symbol"],
+        "status": s.get("status"),
+        "contractType": s.get("contractType"),
+        "baseAsset": s.get("baseAsset"),
+        "quoteAsset": s.get("quoteAsset"),
+        "pricePrecision": s.get("pricePrecision"),
+        "quantityPrecision": s.get("quantityPrecision"),
+        "tickSize": float(filters.get("PRICE_FILTER", {}).get("tickSize", 0)),
+        "stepSize": float(filters.get("LOT_SIZE", {}).get("stepSize", 0)),
+    }
+
+
+# === Registry simbol Futures ===
+# exchangeInfo diunduh sekali lalu di-refresh berkala oleh thread background.
+# Lookup (validasi, tickSize, contractType, status) dijawab dari dict di memori
+# dalam O(1) tanpa request per pesan. Snapshot diganti utuh saat refresh, jadi
+# pembacaan tidak perlu lock; bila refresh gagal snapshot lama tetap dipakai.
+class SymbolRegistry:
+    def __init__(self, fetch, refresh_seconds=SYMBOL_REFRESH_SECONDS):
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self._index = {}
+        self._perpetual = ()
+        self.loaded_at = 0.0
+        self.refreshes = 0
+        self.failures = 0
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def refresh(self, initial=False):
+        with self._lock:
+            if initial and (self.loaded_at or time.time() - self._last_attempt < SYMBOL_RETRY_SECONDS):
+                return bool(self.loaded_at)   # sudah dimuat thread lain / masih jeda retry
+            self._last_attempt = time.time()
+            try:
+                data = self.fetch()
+                index = {s["symbol"]: symbol_info(s) for s in data["symbols"]}
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Gagal refresh exchangeInfo: {e}")
+                return False
+            self._index = index
+            self._perpetual = tuple(sym for sym, info in index.items() if info["contractType"] == "PERPETUAL")
+            self.loaded_at = time.time()
+            self.refreshes += 1
+            return True
+
+    def _ensure_loaded(self):
+        # Load pertama terjadi on-demand; gagal -> dicoba lagi paling cepat tiap SYMBOL_RETRY_SECONDS
+        if not self.loaded_at:
+            self.refresh(initial=True)
+        self.start()
+
+    # --- Background refresh ---
+    def start(self):
+        if self._thread is not None:
+            return self
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="symbol-registry", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.refresh_seconds if self.loaded_at else SYMBOL_RETRY_SECONDS
+            if self._stop.wait(wait):
+                break
+            self.refresh()
+
+    # --- Lookup ---
+    def get(self, symbol):
+        self._ensure_loaded()
+        return self._index.get(symbol.upper())
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def is_valid(self, symbol, contract_type="PERPETUAL"):
+        info = self.get(symbol)
+        return info is not None and (contract_type is None or info["contractType"] == contract_type)
+
+    def tick_size(self, symbol):
+        info = self.get(symbol)
+        return info["tickSize"] if info else None
+
+    def perpetual_symbols(self):
+        self._ensure_loaded()
+        return list(self._perpetual)
+
+    def stats(self):
+        return {
+            "symbols": len(self._index),
+            "perpetual": len(self._perpetual),
+            "loaded_at": self.loaded_at,
+            "age": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
@@ -0,0 +1,238 @@
+import os
+import time
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import stage, current_command
+
+# === Konfigurasi pengiriman Telegram ===
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_SEND_WORKERS = int(os.getenv("TELEGRAM_SEND_WORKERS", "8"))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))        # pesan/detik per bot
+TELEGRAM_CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "1"))     # detik antar pesan ke chat privat
+TELEGRAM_GROUP_INTERVAL = float(os.getenv("TELEGRAM_GROUP_INTERVAL", "3"))   # grup: 20 pesan/menit
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "15"))
+MESSAGE_LIMIT = 4096
+
+
+class TelegramError(Exception):
+    pass
+
+
+class _Job:
+    __slots__ = ("method", "data", "files", "futures", "attempts", "command")
+
+    def __init__(self, method, data, files=None):
+        self.method = method
+        self.data = data
+        self.files = files
+        self.futures = [Future()]
+        self.attempts = 0
+        self.command = current_command()   # label metrik dari perintah yang mengirim
+
+    def coalescable(self):
+        # Hanya teks polos tanpa keyboard/opsi lain yang boleh digabung
+        return self.method == "sendMessage" and set(self.data) <= {"chat_id", "text", "parse_mode"}
+
+
+# === Sender Telegram keluar (satu per token bot) ===
+# Satu requests.Session dengan pool koneksi (tanpa TLS handshake per pesan) dan
+# antrean per chat. Worker mengambil chat yang sudah boleh dikirimi sesuai batas
+# global (TELEGRAM_GLOBAL_RATE) dan per chat (1 pesan/detik, grup 3 detik).
+# Beberapa pesan teks yang menumpuk untuk chat yang sama digabung jadi satu
+# pesan (maks 4096 karakter). Respons 429 menunda chat sesuai retry_after lalu
+# dicoba ulang; error jaringan/5xx dicoba ulang dengan backoff.
+# send_message/send_photo langsung mengembalikan Future berisi objek Message.
+class TelegramSender:
+    def __init__(self, token, workers=TELEGRAM_SEND_WORKERS, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_interval=TELEGRAM_CHAT_INTERVAL, group_interval=TELEGRAM_GROUP_INTERVAL):
+        self.base_url = f"{TELEGRAM_API_URL}/bot{token}"
+        self.workers = workers
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._chats = {}            # chat_id -> deque[_Job]
+        self._next_at = {}          # chat_id -> waktu paling cepat boleh kirim lagi
+        self._ready = []            # heap (waktu siap, seq, chat_id) untuk chat yang punya antrean
+        self._scheduled = set()     # chat di heap atau sedang dikirim
+        self._seq = 0
+        self._global_next = 0.0
+        self._cond = threading.Condition()
+        self._threads = []
+        self.sent = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"telegram-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    # --- API publik ---
+    def send_message(self, chat_id, text, parse_mode=None, **extra):
+        data = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            data["parse_mode"] = parse_mode
+        data.update({k: v for k, v in extra.items() if v is not None})
+        return self._submit(_Job("sendMessage", data))
+
+    def send_photo(self, chat_id, photo, caption=None, **extra):
+        data = {"chat_id": chat_id}
+        if caption:
+            data["caption"] = caption
+        data.update({k: v for k, v in extra.items() if v is not None})
+        files = None
+        if isinstance(photo, str):
+            data["photo"] = photo           # file_id atau URL
+        else:
+            # Dibaca sekali ke bytes agar bisa dikirim ulang saat retry
+            content = photo.read() if hasattr(photo, "read") else bytes(photo)
+            files = {"photo": ("chart.png", content)}
+        return self._submit(_Job("sendPhoto", data, files))
+
+    def _submit(self, job):
+        chat_id = str(job.data["chat_id"])
+        self.start()
+        with self._cond:
+            self._chats.setdefault(chat_id, deque()).append(job)
+            if chat_id not in self._scheduled:
+                self._schedule(chat_id, self._next_at.get(chat_id, 0.0))
+            self._cond.notify()
+        return job.futures[0]
+
+    # --- Penjadwalan (dipanggil dengan lock) ---
+    def _schedule(self, chat_id, at):
+        self._seq += 1
+        heapq.heappush(self._ready, (at, self._seq, chat_id))
+        self._scheduled.add(chat_id)
+
+    def _take(self, chat_id):
+        queue = self._chats[chat_id]
+        job = queue.popleft()
+        if not job.coalescable():
+            return job
+        texts = [job.data["text"]]
+        size = len(job.data["text"])
+        while queue and queue[0].coalescable() \
+                and queue[0].data.get("parse_mode") == job.data.get("parse_mode") \
+                and size + 2 + len(queue[0].data["text"]) <= MESSAGE_LIMIT:
+            nxt = queue.popleft()
+            texts.append(nxt.data["text"])
+            size += 2 + len(nxt.data["text"])
+            job.futures.extend(nxt.futures)
+            self.coalesced += 1
+        if len(texts) > 1:
+            job.data = dict(job.data, text="\n\n".join(texts))
+        return job
+
+    def _interval(self, chat_id):
+        return self.group_interval if chat_id.startswith("-") else self.chat_interval
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._ready:
+                        at = max(self._ready[0][0], self._global_next)
+                        if at <= now:
+                            break
+                        self._cond.wait(at - now)
+                    else:
+                        self._cond.wait()
+                _, _, chat_id = heapq.heappop(self._ready)
+                job = self._take(chat_id)
+                self._global_next = max(now, self._global_next) + 1.0 / self.global_rate
+                self._next_at[chat_id] = now + self._interval(chat_id)
+
+            delay, error = self._send(job)
+
+            with self._cond:
+                queue = self._chats[chat_id]
+                if delay is not None:
+                    queue.appendleft(job)
+                    self._next_at[chat_id] = max(self._next_at[chat_id], time.monotonic() + delay)
+                if queue:
+                    self._schedule(chat_id, self._next_at[chat_id])
+                    self._cond.notify()
+                else:
+                    self._scheduled.discard(chat_id)
+                    del self._chats[chat_id]
+                if error is not None:
+                    self.failed += 1
+
+            if error is not None:
+                print(f"❌ Telegram {job.method} ke {chat_id} gagal: {error}")
+                for fut in job.futures:
+                    fut.set_exception(error)
+
+    def _send(self, job):
+        # Return (delay retry, error): (None, None) sukses, (detik, None) coba ulang
+        job.attempts += 1
+        try:
+            with stage("telegram", command=job.command):
+                res = self.session.post(f"{self.base_url}/{job.method}", data=job.data, files=job.files, timeout=TELEGRAM_TIMEOUT)
+                body = res.json()
+        except Exception as e:
+            if job.attempts <= TELEGRAM_MAX_RETRIES:
+                with self._cond:
+                    self.retries += 1
+                return min(2 ** job.attempts, 30), None
+            return None, TelegramError(str(e))
+
+        if body.get("ok"):
+            with self._cond:
+                self.sent += 1
+            for fut in job.futures:
+                fut.set_result(body.get("result"))
+            return None, None
+        if res.status_code == 429 or res.status_code >= 500:
+            if job.attempts <= TELEGRAM_MAX_RETRIES:
+                with self._cond:
+                    self.retries += 1
+                    if res.status_code == 429:
+                        self.rate_limited += 1
+                if res.status_code == 429:
+                    return float(body.get("parameters", {}).get("retry_after", 1)), None
+                return min(2 ** job.attempts, 30), None
+        return None, TelegramError(f"{res.status_code} {body.get('description', res.text)}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": sum(len(q) for q in self._chats.values()),
+                "chats": len(self._chats),
+                "sent": self.sent,
+                "coalesced": self.coalesced,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failed": self.failed,
+            }
+
+
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def telegram_sender(token):
+    with _senders_lock:
+        sender = _senders.get(token)
+        if sender is None:
+            sender = _senders[token] = TelegramSender(token)
+        return sender
@@ -1,60 +1,96 @@
-from flask import Flask, request
+from flask import Flask, request, Response
 import os
 import pandas as pd
 import numpy as np
 import ta
 import telebot
 from datetime import datetime
-from binance.client import Client
+from binance_governor import binance_client, governor
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from ta.momentum import RSIIndicator
-from chart_generator import draw_chart_by_timeframe  # Pastikan file ini tersedia dan berfungsi
+from chart_generator import send_chart, chart_template  # Pastikan file ini tersedia dan berfungsi
+from kline_cache import kline_cache
+from chart_cache import chart_cache
+from scanner import scan_symbols
+from job_queue import job_queue
+from indicator_state import indicator_state
+from kline_stream import start_kline_stream, stream_klines
+from ohlcv import OHLCVWindow
+from history import HistoryLoader
+from kline_store import kline_store
+from strategy import backtest_arrays
+from candle_patterns import LONG_PATTERNS, SHORT_PATTERNS, scan_frame, reversal_pattern, names as pattern_names
+import metrics
+from metrics import stage, timed
 
 app = Flask(__name__)
 
 # Load environment variables
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_BOT = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
+# send_photo diukur di send_chart
+metrics.instrument(TELEGRAM_BOT, "telegram", "send_message")
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
 BINANCE_API_SECRET = os.getenv("BINANCE_API_SECRET")
 
-client = Client(BINANCE_API_KEY, BINANCE_API_SECRET)
+# REST lewat governor weight Binance (token bucket + penggabungan request identik)
+client = binance_client(BINANCE_API_KEY, BINANCE_API_SECRET)
 
 POPULAR_SYMBOLS = [
     "BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT",
     "ADAUSDT", "AVAXUSDT", "DOGEUSDT", "DOTUSDT", "MATICUSDT"
 ]
-
-def get_klines(symbol, interval="5m", limit=100):
+if os.getenv("POPULAR_SYMBOLS"):
+    POPULAR_SYMBOLS = [s.strip().upper() for s in os.getenv("POPULAR_SYMBOLS").split(",") if s.strip()]
+
+@timed("binance")
+def fetch_klines(symbol, interval, limit):
+    return client.get_klines(symbol=symbol, interval=interval, limit=limit)
+
+@timed("binance")
+def fetch_kline_page(symbol, interval, limit, end_time=None):
+    if end_time is None:
+        return client.get_klines(symbol=symbol, interval=interval, limit=limit)
+    return client.get_klines(symbol=symbol, interval=interval, limit=limit, endTime=end_time)
+
+# Candle close disimpan di KlineStore lokal; REST hanya untuk candle yang belum tersimpan
+def fetch_ohlcv(symbol, interval, limit):
+    return kline_store("spot").live(symbol, interval, limit, fetch_kline_page)
+
+# Histori panjang untuk backtest, dibaca dari store yang sama
+history = HistoryLoader(fetch_kline_page, kline_store("spot"))
+BACKTEST_HISTORY_DAYS = int(os.getenv("BACKTEST_HISTORY_DAYS", "90"))
+# Batas atas hari dari chat: tiap hari 1m = 2 halaman REST + 1440 baris di store & memori
+BACKTEST_MAX_DAYS = int(os.getenv("BACKTEST_MAX_DAYS", "365"))
+
+# Simbol yang di-stream via WebSocket (kosong = REST saja)
+STREAM_SYMBOLS = [s.strip().upper() for s in os.getenv("STREAM_SYMBOLS", "").split(",") if s.strip()]
+STREAM_INTERVALS = ["1m", "5m", "15m", "1h"]
+
+# Window OHLCV (array NumPy), tanpa membangun DataFrame
+def get_ohlcv(symbol, interval="5m", limit=100):
     try:
-        raw = client.get_klines(symbol=symbol, interval=interval, limit=limit)
-        if not raw or len(raw) < limit // 2:
-            print(f"⚠️ Data kline {symbol}-{interval} tidak mencukupi. Dapat: {len(raw)}")
+        raw = stream_klines(symbol, interval, limit)
+        if raw is not None:
+            window = OHLCVWindow.from_klines(raw)
+        else:
+            window = kline_cache.get(symbol, interval, limit, fetch_ohlcv)
+        if window is None or len(window) < limit // 2:
+            print(f"⚠️ Data kline {symbol}-{interval} tidak mencukupi. Dapat: {len(window) if window is not None else 0}")
             return None
-
-        df = pd.DataFrame(raw, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base', 'taker_buy_quote', 'ignore'
-        ])
-
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-
-        # Ubah kolom angka jadi float, dengan error handling
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        df.dropna(inplace=True)
-
-        return df[['open', 'high', 'low', 'close', 'volume']]
+        return window
     except Exception as e:
         print(f"❌ ERROR get_klines({symbol}, {interval}): {e}")
         return None
 
+def get_klines(symbol, interval="5m", limit=100):
+    window = get_ohlcv(symbol, interval, limit)
+    return window.to_frame() if window is not None else None
+
 def get_24h_high_low(symbol):
     try:
-        ticker = client.get_ticker(symbol=symbol)
+        with stage("binance"):
+            ticker = client.get_ticker(symbol=symbol)
         high = float(ticker['highPrice'])
         low = float(ticker['lowPrice'])
         return high, low
@@ -63,92 +99,50 @@ def get_24h_high_low(symbol):
         return None, None
 
 def is_rsi_oversold(symbol, interval="15m", limit=100):
-    df = get_klines(symbol, interval, limit)
-    if df is None or df.empty or len(df) < 15:
+    window = get_ohlcv(symbol, interval, limit)
+    if window is None or len(window) < 15:
         return False, None
 
     try:
-        rsi_indicator = ta.momentum.RSIIndicator(close=df["close"], window=14)
-        df["RSI_14"] = rsi_indicator.rsi()
-        latest_rsi = df["RSI_14"].iloc[-1]
+        with stage("indicators"):
+            latest_rsi = indicator_state(symbol, interval).sync_window(window)["RSI"]
         return latest_rsi < 30, latest_rsi
     except Exception as e:
         print(f"❌ Error hitung RSI {symbol}: {e}")
         return False, None
         
 def check_rsi_overbought(symbols, interval="15m", limit=100):
+    def latest_rsi(symbol):
+        window = get_ohlcv(symbol, interval, limit)
+        if window is None or len(window) < 15:
+            return None
+        with stage("indicators"):
+            return indicator_state(symbol, interval).sync_window(window)["RSI"]
+
     overbought_list = []
-    for symbol in symbols:
-        df = get_klines(symbol, interval, limit)
-        if df is None or len(df) < 15:
-            continue
-        try:
-            rsi = ta.momentum.RSIIndicator(df['close'], window=14).rsi().iloc[-1]
-            if rsi > 70:
-                overbought_list.append((symbol, round(rsi, 2)))
-        except Exception as e:
-            print(f"❌ Error RSI {symbol}: {e}")
+    for symbol, rsi, error in scan_symbols(latest_rsi, symbols):
+        if error:
+            print(f"❌ Error RSI {symbol}: {error}")
+        elif rsi is not None and rsi > 70:
+            overbought_list.append((symbol, round(rsi, 2)))
     return sorted(overbought_list, key=lambda x: -x[1])  # Urutkan dari RSI tertinggi
 
-# Ganti fungsi ini
-def detect_reversal_candle(df):
-    if len(df) < 3:
-        return None
-
-    c1 = df.iloc[-3]  # Candle pertama (pola)
-    c2 = df.iloc[-2]  # Candle kedua
-    c3 = df.iloc[-1]  # Candle ketiga (konfirmasi)
-
-    def body(c): return abs(c['close'] - c['open'])
-    def upper(c): return c['high'] - max(c['close'], c['open'])
-    def lower(c): return min(c['close'], c['open']) - c['low']
-    def is_bullish(c): return c['close'] > c['open']
-    def is_bearish(c): return c['close'] < c['open']
-    def body_ratio(c): return body(c) / (c['high'] - c['low'] + 1e-6)
-
-    # --- HAMMER ---
-    if body_ratio(c2) < 0.3 and lower(c2) > 2 * body(c2) and upper(c2) < body(c2):
-        if is_bullish(c3):  # konfirmasi naik
-            return "Hammer"
-
-    # --- INVERTED HAMMER ---
-    if body_ratio(c2) < 0.3 and upper(c2) > 2 * body(c2) and lower(c2) < body(c2):
-        if is_bullish(c3):
-            return "InvertedHammer"
-
-    # --- BULLISH ENGULFING ---
-    if is_bearish(c1) and is_bullish(c2) and c2['open'] < c1['close'] and c2['close'] > c1['open']:
-        if is_bullish(c3):
-            return "Engulfing"
-
-    # --- SHOOTING STAR ---
-    if body_ratio(c2) < 0.3 and upper(c2) > 2 * body(c2) and lower(c2) < body(c2):
-        if is_bearish(c3):
-            return "ShootingStar"
-
-    # --- BEARISH ENGULFING ---
-    if is_bullish(c1) and is_bearish(c2) and c2['open'] > c1['close'] and c2['close'] < c1['open']:
-        if is_bearish(c3):
-            return "Engulfing"
-
-    return None
-
-def backtest_strategy(symbol, interval="1m", limit=500):
-    df = get_klines(symbol, interval, limit)
-    if df is None or df.shape[0] < 100:
-        return []
-
+def add_backtest_indicators(df):
     df['EMA20'] = df['close'].ewm(span=20).mean()
     df['RSI'] = ta.momentum.RSIIndicator(df['close'], window=14).rsi()
     bb = ta.volatility.BollingerBands(df['close'], window=20, window_dev=2)
     df['BB_H'] = bb.bollinger_hband()
     df['BB_L'] = bb.bollinger_lband()
+    return df
 
+def backtest_loop(df):
     results = []
+    patterns = scan_frame(df)
+    reversal = reversal_pattern(patterns)
     for i in range(30, len(df) - 10):
         candle = df.iloc[i]
         trend = "UP" if df.iloc[i-5:i]['close'].mean() > df.iloc[i-5:i]['EMA20'].mean() else "DOWN"
-        candle_pattern = detect_reversal_candle(df.iloc[i-2:i+1])
+        candle_pattern = reversal[i]
 
         entry = candle['close']
         result = None
@@ -156,7 +150,7 @@ def backtest_strategy(symbol, interval="1m", limit=500):
         stop_loss = None
         RR = None
 
-        if trend == "UP" and candle['RSI'] < 30 and candle['close'] < candle['BB_L'] and candle_pattern in ['Hammer', 'InvertedHammer', 'Engulfing']:
+        if trend == "UP" and candle['RSI'] < 30 and candle['close'] < candle['BB_L'] and candle_pattern & LONG_PATTERNS:
             stop_loss = df.iloc[i]['low']
             take_profit = entry + (entry - stop_loss) * 2
             future = df.iloc[i+1:i+6]
@@ -165,7 +159,7 @@ def backtest_strategy(symbol, interval="1m", limit=500):
             elif (future['low'] <= stop_loss).any():
                 result = "LOSS"
 
-        elif trend == "DOWN" and candle['RSI'] > 70 and candle['close'] > candle['BB_H'] and candle_pattern in ['ShootingStar', 'Engulfing']:
+        elif trend == "DOWN" and candle['RSI'] > 70 and candle['close'] > candle['BB_H'] and candle_pattern & SHORT_PATTERNS:
             stop_loss = df.iloc[i]['high']
             take_profit = entry - (stop_loss - entry) * 2
             future = df.iloc[i+1:i+6]
@@ -180,29 +174,78 @@ def backtest_strategy(symbol, interval="1m", limit=500):
 
     return results
 
-def backtest_all_symbols(symbols, interval="1m", limit=500):
+# === Backtest versi array (NumPy) ===
+# Hasil WIN/LOSS identik dengan backtest_loop, tapi semua kondisi dihitung sekaligus per array.
+def backtest_vectorized(df, forward=5):
+    idx, win = backtest_arrays(
+        df['open'].to_numpy(dtype=float),
+        df['high'].to_numpy(dtype=float),
+        df['low'].to_numpy(dtype=float),
+        df['close'].to_numpy(dtype=float),
+        df['EMA20'].to_numpy(dtype=float),
+        df['RSI'].to_numpy(dtype=float),
+        df['BB_H'].to_numpy(dtype=float),
+        df['BB_L'].to_numpy(dtype=float),
+        forward=forward,
+    )
+    return [
+        {"index": int(i), "result": "WIN" if w else "LOSS", "RR": 2.0}
+        for i, w in zip(idx, win)
+    ]
+
+def backtest_strategy(symbol, interval="1m", limit=500, vectorized=True):
+    df = get_klines(symbol, interval, limit)
+    if df is None or df.shape[0] < 100:
+        return []
+
+    with stage("backtest"):
+        add_backtest_indicators(df)
+        if vectorized:
+            return backtest_vectorized(df)
+        return backtest_loop(df)
+
+# Backtest atas histori berbulan-bulan (default BACKTEST_HISTORY_DAYS hari candle 1m)
+def backtest_history(symbol, interval="1m", days=None):
+    window = history.load(symbol, interval, days=min(days or BACKTEST_HISTORY_DAYS, BACKTEST_MAX_DAYS))
+    if len(window) < 100:
+        return []
+    with stage("backtest"):
+        df = add_backtest_indicators(window.to_frame())
+        return backtest_vectorized(df)
+
+def summarize_backtest(symbol, results):
+    total = len(results)
+    wins = sum(1 for r in results if r["result"] == "WIN")
+    losses = sum(1 for r in results if r["result"] == "LOSS")
+    rr_list = [r["RR"] for r in results if r["RR"] is not None]
+    accuracy = (wins / total) * 100 if total > 0 else 0
+    avg_rr = np.mean(rr_list) if rr_list else 0
+    profit_factor = (wins * 2) / (losses * 1) if losses > 0 else float("inf")
+    return {
+        "symbol": symbol,
+        "total_trades": total,
+        "wins": wins,
+        "losses": losses,
+        "accuracy": round(accuracy, 2),
+        "avg_rr": round(avg_rr, 2),
+        "profit_factor": round(profit_factor, 2) if isinstance(profit_factor, float) else "∞"
+    }
+
+def backtest_all_symbols(symbols, interval="1m", limit=500, days=None):
+    if days:
+        run = lambda s: backtest_history(s, interval, days)
+    else:
+        run = lambda s: backtest_strategy(s, interval, limit)
     summary = []
-    for symbol in symbols:
-        results = backtest_strategy(symbol, interval, limit)
+    for symbol, results, error in scan_symbols(run, symbols, timeout=600 if days else None):
+        if error:
+            print(f"❌ Error backtest {symbol}: {error}")
+            continue
         if not results:
             continue
-        total = len(results)
-        wins = sum(1 for r in results if r["result"] == "WIN")
-        losses = sum(1 for r in results if r["result"] == "LOSS")
-        rr_list = [r["RR"] for r in results if r["RR"] is not None]
-        accuracy = (wins / total) * 100 if total > 0 else 0
-        avg_rr = np.mean(rr_list) if rr_list else 0
-        profit_factor = (wins * 2) / (losses * 1) if losses > 0 else float("inf")
-        summary.append({
-            "symbol": symbol,
-            "total_trades": total,
-            "wins": wins,
-            "losses": losses,
-            "accuracy": round(accuracy, 2),
-            "avg_rr": round(avg_rr, 2),
-            "profit_factor": round(profit_factor, 2) if isinstance(profit_factor, float) else "∞"
-        })
-    return summary
+        summary.append(summarize_backtest(symbol, results))
+    order = {s: i for i, s in enumerate(symbols)}
+    return sorted(summary, key=lambda s: order[s["symbol"]])
 
 def format_summary(summary):
     lines = ["📊 *Rangkuman Backtest Semua Pair:*\n"]
@@ -213,24 +256,23 @@ def format_summary(summary):
     return "\n".join(lines)
 
 def analyze_multi_timeframe(symbol):
-    df_15m = get_klines(symbol, '15m', 500)
-    df_5m = get_klines(symbol, '5m', 500)
+    ohlcv_15m = get_ohlcv(symbol, '15m', 500)
+    ohlcv_5m = get_ohlcv(symbol, '5m', 500)
     df_1m = get_klines(symbol, '1m', 500)
 
-    if df_1m is None or df_5m is None or df_15m is None:
+    if df_1m is None or ohlcv_5m is None or ohlcv_15m is None:
         print(f"⚠️ Gagal ambil data untuk {symbol}. Timeframe yang error:")
-        if df_15m is None: print("- 15m")
-        if df_5m is None: print("- 5m")
+        if ohlcv_15m is None: print("- 15m")
+        if ohlcv_5m is None: print("- 5m")
         if df_1m is None: print("- 1m")
         return f"❌ Gagal ambil data {symbol}", "ERROR", 0
 
     try:
-        for df in [df_15m, df_5m, df_1m]:
-            df['EMA20'] = df['close'].ewm(span=20).mean()
-            df['RSI'] = ta.momentum.RSIIndicator(df['close'], window=14).rsi()
-            bb = ta.volatility.BollingerBands(df['close'], window=20, window_dev=2)
-            df['BB_H'] = bb.bollinger_hband()
-            df['BB_L'] = bb.bollinger_lband()
+        with stage("indicators"):
+            # 15m & 5m cukup nilai terakhir (streaming), 1m butuh seri penuh untuk SL
+            ind_15m = indicator_state(symbol, '15m').sync_window(ohlcv_15m)
+            ind_5m = indicator_state(symbol, '5m').sync_window(ohlcv_5m)
+            add_backtest_indicators(df_1m)
     except Exception as e:
         print(f"❌ Error hitung indikator: {e}")
         return f"❌ Error indikator {symbol}: {e}", "ERROR", 0
@@ -240,10 +282,12 @@ def analyze_multi_timeframe(symbol):
     stop_loss = None
     take_profit = None
     current_price = df_1m['close'].iloc[-1]
-    candle_pattern = detect_reversal_candle(df_1m)
+    with stage("indicators"):
+        candle_bits = scan_frame(df_1m.iloc[-3:])[-1]   # bitmask pola yang selesai di candle terakhir
+        candle_pattern = reversal_pattern(candle_bits)
 
-    trend_15m = "UP" if df_15m['close'].iloc[-1] > df_15m['EMA20'].iloc[-1] else "DOWN"
-    trend_5m = "UP" if df_5m['close'].iloc[-1] > df_5m['EMA20'].iloc[-1] else "DOWN"
+    trend_15m = "UP" if ind_15m['close'] > ind_15m['EMA20'] else "DOWN"
+    trend_5m = "UP" if ind_5m['close'] > ind_5m['EMA20'] else "DOWN"
     last = df_1m.iloc[-1]
 
     # Ambil high/low 24 jam
@@ -255,7 +299,7 @@ def analyze_multi_timeframe(symbol):
     is_near_24h_high = current_price >= (high_24h - 0.01 * high_24h)
 
     if trend_15m == "UP" and trend_5m == "UP":
-        if last['RSI'] < 30 and last['close'] < last['BB_L'] and is_near_24h_low and candle_pattern in ['Hammer', 'InvertedHammer', 'Engulfing']:
+        if last['RSI'] < 30 and last['close'] < last['BB_L'] and is_near_24h_low and candle_pattern & LONG_PATTERNS:
             signal = "LONG"
             entry = current_price
             prev_below_bb = df_1m[:-1][df_1m['close'] < df_1m['BB_L']]
@@ -264,7 +308,7 @@ def analyze_multi_timeframe(symbol):
             take_profit = entry + (2 * risk)
 
     elif trend_15m == "DOWN" and trend_5m == "DOWN":
-        if last['RSI'] > 70 and last['close'] > last['BB_H'] and is_near_24h_high and candle_pattern in ['ShootingStar', 'Engulfing']:
+        if last['RSI'] > 70 and last['close'] > last['BB_H'] and is_near_24h_high and candle_pattern & SHORT_PATTERNS:
             signal = "SHORT"
             entry = current_price
             prev_above_bb = df_1m[:-1][df_1m['close'] > df_1m['BB_H']]
@@ -278,7 +322,7 @@ def analyze_multi_timeframe(symbol):
     result += f"Trend 5m: {trend_5m}\n"
     result += f"🕯️ RSI 1m: {last['RSI']:.2f}\n"
     result += f"📊 Harga Sekarang: {current_price:.2f}\n"
-    result += f"🕯️ Pola Candle Terbaca: `{candle_pattern or 'Tidak ada'}`\n"
+    result += f"🕯️ Pola Candle Terbaca: `{', '.join(pattern_names(candle_bits)) or 'Tidak ada'}`\n"
     result += f"📈 High 24H: {high_24h:.2f}\n"
     result += f"📉 Low 24H: {low_24h:.2f}\n"
 
@@ -301,8 +345,63 @@ def analyze_multi_timeframe(symbol):
 
 @app.route("/webhook", methods=["POST"])
 def webhook():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
+
+    # Balas Telegram secepatnya, proses berat jalan di worker pool
+    if not job_queue.submit(handle_update, data, job_id=data.get("update_id")):
+        print(f"⏭️ Update {data.get('update_id')} duplikat, diabaikan.")
+    return "OK"
+
+@app.route("/queue", methods=["GET"])
+def queue_stats():
+    return job_queue.stats()
+
+@app.route("/cache", methods=["GET"])
+def cache_stats():
+    return {"klines": kline_cache.stats(), "charts": chart_cache.stats()}
+
+# === Metrik Prometheus ===
+metrics.register_gauges("queue", job_queue.stats)
+metrics.register_gauges("kline_cache", kline_cache.stats)
+metrics.register_gauges("chart_cache", chart_cache.stats)
+metrics.register_gauges("kline_store", lambda: kline_store("spot").stats())
+metrics.register_gauges("binance_spot", governor("spot").stats)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
+# Label perintah untuk metrik (nilai terbatas, bukan teks mentah)
+def command_label(data):
+    if "callback_query" in data:
+        callback_data = data["callback_query"].get("data", "")
+        if callback_data == "BACKTEST":
+            return "backtest_all"
+        if callback_data in ("LONG", "SHORT"):
+            return "scan_" + callback_data.lower()
+        if callback_data.startswith("CHART_"):
+            return "chart_timeframe"
+        return "callback_other"
+    text = data.get("message", {}).get("text", "").strip().upper()
+    if text == "/HELP":
+        return "help"
+    if text == "RSIS":
+        return "rsi_overbought"
+    if text == "RSI":
+        return "rsi_oversold"
+    if text.startswith("CHART "):
+        return "chart"
+    if text.startswith("BACKTEST ") or text.startswith("/BACKTEST "):
+        return "backtest"
+    if len(text) >= 6 and text.isalnum():
+        return "analyze"
+    return "other"
+
+def handle_update(data):
+    with metrics.command(command_label(data)):
+        return dispatch_update(data)
+
+def dispatch_update(data):
     # === Handle callback queries (inline button clicks) ===
     if "callback_query" in data:
         callback_data = data["callback_query"]["data"]
@@ -317,15 +416,16 @@ def webhook():
 
         if callback_data in ["LONG", "SHORT"]:
             found = False
-            TELEGRAM_BOT.send_message(chat_id, f"🔍 Mencari sinyal `{callback_data}` di 10 coin populer...", parse_mode="Markdown")
-            for symbol in POPULAR_SYMBOLS:
+            TELEGRAM_BOT.send_message(chat_id, f"🔍 Mencari sinyal `{callback_data}` di {len(POPULAR_SYMBOLS)} coin populer...", parse_mode="Markdown")
+            for symbol, analysis, error in scan_symbols(analyze_multi_timeframe, POPULAR_SYMBOLS):
+                if error:
+                    print(f"Error cek {symbol}: {error}")
+                    continue
                 try:
-                    message, signal, entry = analyze_multi_timeframe(symbol)
+                    message, signal, entry = analysis
                     if signal == callback_data:
                         TELEGRAM_BOT.send_message(chat_id, message, parse_mode="Markdown")
-                        chart = draw_chart_by_timeframe(symbol, "1m")
-                        if chart:
-                            TELEGRAM_BOT.send_photo(chat_id=chat_id, photo=chart)
+                        send_chart(TELEGRAM_BOT, TELEGRAM_BOT_TOKEN, chat_id, symbol, "1m")
 
                         markup = InlineKeyboardMarkup()
                         button = InlineKeyboardButton(
@@ -345,9 +445,8 @@ def webhook():
         if callback_data.startswith("CHART_"):
             try:
                 _, symbol, timeframe = callback_data.split("_")
-                chart = draw_chart_by_timeframe(symbol, timeframe)
                 caption = f"📊 {symbol} - {timeframe.upper()} Chart"
-                TELEGRAM_BOT.send_photo(chat_id=chat_id, photo=chart, caption=caption)
+                send_chart(TELEGRAM_BOT, TELEGRAM_BOT_TOKEN, chat_id, symbol, timeframe, caption=caption)
 
                 markup = InlineKeyboardMarkup()
                 btn_binance = InlineKeyboardButton(
@@ -376,6 +475,7 @@ def webhook():
                 "RSI — Tampilkan coin dengan RSI Oversold (15m)\n"
                 "RSIS — Tampilkan coin dengan RSI > 70 (Overbought)\n"
                 "CHART BTCUSDT — Lihat chart + sinyal untuk pair tertentu\n"
+                "BACKTEST BTCUSDT 90 — Backtest histori 1m beberapa bulan (hari)\n"
                 "BTCUSDT, ETHUSDT, dst — Analisa spesifik pair\n"
                 "/HELP — Tampilkan bantuan ini\n\n"
                 "💡 Tips: Gunakan di saat volatilitas tinggi untuk sinyal terbaik."
@@ -411,15 +511,16 @@ def webhook():
             TELEGRAM_BOT.send_message(chat_id, "📉 Mendeteksi RSI oversold pada coin populer (15m)...")
             oversold_list = []
 
-            for symbol in POPULAR_SYMBOLS:
+            for symbol, oversold, error in scan_symbols(lambda s: is_rsi_oversold(s, interval="15m"), POPULAR_SYMBOLS):
+                if error:
+                    print(f"Error cek RSI {symbol}: {error}")
+                    continue
                 try:
-                    is_oversold, rsi_val = is_rsi_oversold(symbol, interval="15m")
+                    is_oversold, rsi_val = oversold
                     if is_oversold:
                         oversold_list.append(f"🔻 *{symbol}* - RSI: `{rsi_val:.2f}`")
 
-                        chart = draw_chart_by_timeframe(symbol, "15m")
-                        if chart:
-                            TELEGRAM_BOT.send_photo(chat_id=chat_id, photo=chart, caption=f"{symbol} - RSI: {rsi_val:.2f}")
+                        send_chart(TELEGRAM_BOT, TELEGRAM_BOT_TOKEN, chat_id, symbol, "15m", caption=f"{symbol} - RSI: {rsi_val:.2f}")
                 except Exception as e:
                     print(f"Error cek RSI {symbol}: {e}")
 
@@ -456,6 +557,25 @@ def webhook():
                 TELEGRAM_BOT.send_message(chat_id, "⚠️ Format tidak valid. Contoh: `CHART BTCUSDT`", parse_mode="Markdown")
             return "OK"
 
+        # === BACKTEST histori panjang ===
+        if text.startswith("BACKTEST ") or text.startswith("/BACKTEST "):
+            parts = text.split()
+            symbol = parts[1]
+            days = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else BACKTEST_HISTORY_DAYS
+            if days > BACKTEST_MAX_DAYS:
+                TELEGRAM_BOT.send_message(chat_id, f"⚠️ Maksimal {BACKTEST_MAX_DAYS} hari, backtest dibatasi ke {BACKTEST_MAX_DAYS} hari.")
+                days = BACKTEST_MAX_DAYS
+            TELEGRAM_BOT.send_message(chat_id, f"🧪 Backtest {symbol} 1m selama {days} hari...")
+            try:
+                results = backtest_history(symbol, "1m", days)
+                if not results:
+                    TELEGRAM_BOT.send_message(chat_id, f"⚠️ Tidak ada trade untuk {symbol} dalam {days} hari.")
+                else:
+                    TELEGRAM_BOT.send_message(chat_id, format_summary([summarize_backtest(symbol, results)]), parse_mode="Markdown")
+            except Exception as e:
+                TELEGRAM_BOT.send_message(chat_id, f"⚠️ Gagal backtest {symbol}: {e}")
+            return "OK"
+
         # === Simbol langsung ===
         if len(text) >= 6 and text.isalnum():
             try:
@@ -463,9 +583,7 @@ def webhook():
                 TELEGRAM_BOT.send_message(chat_id, message, parse_mode="Markdown")
 
                 if signal != "NONE":
-                    chart = draw_chart_by_timeframe(text, "1m")
-                    if chart:
-                        TELEGRAM_BOT.send_photo(chat_id, chart)
+                    send_chart(TELEGRAM_BOT, TELEGRAM_BOT_TOKEN, chat_id, text, "1m")
 
                     markup = InlineKeyboardMarkup()
                     button = InlineKeyboardButton(
@@ -482,6 +600,17 @@ def webhook():
     return "OK"
 
    
+if STREAM_SYMBOLS:
+    start_kline_stream(STREAM_SYMBOLS, STREAM_INTERVALS, fetch_klines)
+
+# Dipanggil serve.py di background setelah app siap: template chart per timeframe
+# dibuat dan digambar sekali (font + renderer Agg) sebelum permintaan chart pertama
+def warmup():
+    for tf in STREAM_INTERVALS:
+        tpl = chart_template(tf)
+        with tpl.lock:
+            tpl.canvas.draw()
+
 if __name__ == '__main__':
     port = int(os.getenv("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
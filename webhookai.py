@@ -6,41 +6,47 @@ import json
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import numpy as np
-import openai
-from flask import Flask, request
-from collections import defaultdict
-from threading import Thread
+from flask import Flask, request, Response
 from datetime import datetime
 from dotenv import load_dotenv
+from symbol_registry import SymbolRegistry
+from telegram_sender import telegram_sender
+from scanner import scan_symbols
+import binance_governor
+from ai_cache import ai_cache, ai_key, chat_completion, AIBusy
+from state_backend import state_backend
+from job_queue import job_queue
+import metrics
+from metrics import stage, timed
 
 load_dotenv()
 app = Flask(__name__)
 
 # --- Konfigurasi ---
-BINANCE_BASE = "https://fapi.binance.com"
+BINANCE_BASE = binance_governor.BINANCE_FUTURES_URL
 TELEGRAM_TOKEN = os.getenv("BOT_TOKEN")
 TELEGRAM_CHAT = os.getenv("BOT_CHAT_ID")
-openai.api_key = os.getenv("OPENAI_API_KEY")
 RATE_LIMIT_SECONDS = 60
-last_request_time = defaultdict(lambda: 0)
+SCREENER_CONCURRENCY = int(os.getenv("SCREENER_CONCURRENCY", "16"))
+SCREENER_TOLERANCE = 0.003
 
 # --- Tools ---
 
 def send_telegram(chat_id, text):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    data = {"chat_id": chat_id, "text": text, "parse_mode": "Markdown"}
-    requests.post(url, json=data)
+    return telegram_sender(TELEGRAM_TOKEN).send_message(chat_id, text, parse_mode="Markdown")
 
 def send_telegram_photo(chat_id, img_bytes, caption=""):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendPhoto"
-    files = {"photo": img_bytes}
-    data = {"chat_id": chat_id, "caption": caption}
-    requests.post(url, data=data, files=files)
+    return telegram_sender(TELEGRAM_TOKEN).send_photo(chat_id, img_bytes, caption=caption)
 
+# Satu session untuk semua request REST Binance (koneksi keep-alive dipakai ulang),
+# lewat governor weight: token bucket futures + penggabungan request identik
+binance_session = binance_governor.binance_session()
+
+@timed("binance")
 def get_klines(symbol, interval="1m", limit=100):
     url = f"{BINANCE_BASE}/fapi/v1/klines?symbol={symbol}&interval={interval}&limit={limit}"
     try:
-        res = requests.get(url, timeout=5).json()
+        res = binance_session.get(url, timeout=5).json()
         return res if isinstance(res, list) else []
     except:
         return []
@@ -73,39 +79,72 @@ def fibonacci_levels(data):
     }
     return levels
 
-def get_active_futures_pairs():
+@timed("binance")
+def fetch_exchange_info():
     url = f"{BINANCE_BASE}/fapi/v1/exchangeInfo"
-    data = requests.get(url).json()
-    return [s["symbol"] for s in data["symbols"] if s["contractType"] == "PERPETUAL"]
+    return binance_session.get(url, timeout=10).json()
+
+# exchangeInfo dimuat sekali lalu di-refresh di background; lookup dari index di memori
+futures_symbols = SymbolRegistry(fetch_exchange_info)
+
+def get_active_futures_pairs():
+    return futures_symbols.perpetual_symbols()
 
 def is_valid_futures_symbol(symbol):
-    return symbol in get_active_futures_pairs()
+    return futures_symbols.is_valid(symbol)
 
+@timed("binance")
 def get_top_volume_pairs():
     url = f"{BINANCE_BASE}/fapi/v1/ticker/24hr"
     try:
-        data = requests.get(url, timeout=5).json()
+        data = binance_session.get(url, timeout=5).json()
         filtered = [d for d in data if d["symbol"].endswith("USDT")]
         sorted_data = sorted(filtered, key=lambda x: float(x["quoteVolume"]), reverse=True)
         return [f"{d['symbol']} (${float(d['quoteVolume'])/1e6:.1f}M)" for d in sorted_data[:10]]
     except:
         return []
 
-def detect_support_resistance():
-    symbols = get_top_volume_pairs()
-    results_support, results_resistance = [], []
-    for entry in symbols:
-        symbol = entry.split(" ")[0]
-        klines = get_klines(symbol, "1h")
-        closes = [float(k[4]) for k in klines]
-        price_now = closes[-1]
-        levels = fibonacci_levels(closes)
-        fib_support = levels["0.618"]
-        fib_resist = levels["0.236"]
-        if abs(price_now - fib_support) / fib_support < 0.003:
-            results_support.append((symbol, price_now, fib_support))
-        if abs(price_now - fib_resist) / fib_resist < 0.003:
-            results_resistance.append((symbol, price_now, fib_resist))
+def get_usdt_perpetual_pairs():
+    infos = (futures_symbols.get(s) for s in get_active_futures_pairs())
+    return [i["symbol"] for i in infos if i["quoteAsset"] == "USDT" and i["status"] == "TRADING"]
+
+@timed("indicators")
+def fibonacci_proximity(closes):
+    # closes: matriks simbol x bar (NaN di kiri untuk histori yang lebih pendek)
+    high = np.nanmax(closes, axis=1)
+    low = np.nanmin(closes, axis=1)
+    diff = high - low
+    price_now = closes[:, -1]
+    fib_support = high - 0.618 * diff
+    fib_resist = high - 0.236 * diff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dist_support = np.abs(price_now - fib_support) / fib_support
+        dist_resist = np.abs(price_now - fib_resist) / fib_resist
+    return price_now, fib_support, fib_resist, dist_support, dist_resist
+
+# === Screener support/resistance seluruh market ===
+# Kline 1h semua pair USDT perpetual diambil paralel, close disusun jadi matriks
+# simbol x bar, lalu level Fibonacci dan jarak harga dihitung sekali jalan.
+def detect_support_resistance(symbols=None, interval="1h", limit=100, tolerance=SCREENER_TOLERANCE):
+    symbols = get_usdt_perpetual_pairs() if symbols is None else symbols
+    closes = {}
+    for symbol, klines, error in scan_symbols(lambda s: get_klines(s, interval, limit), symbols, concurrency=SCREENER_CONCURRENCY):
+        if klines:
+            closes[symbol] = [float(k[4]) for k in klines[-limit:]]
+    if not closes:
+        return [], []
+
+    names = list(closes)
+    matrix = np.full((len(names), limit), np.nan)
+    for i, name in enumerate(names):
+        row = closes[name]
+        matrix[i, limit - len(row):] = row
+    price_now, fib_support, fib_resist, dist_support, dist_resist = fibonacci_proximity(matrix)
+
+    near_support = np.flatnonzero(dist_support < tolerance)
+    near_resist = np.flatnonzero(dist_resist < tolerance)
+    results_support = [(names[i], price_now[i], fib_support[i]) for i in near_support[np.argsort(dist_support[near_support])]]
+    results_resistance = [(names[i], price_now[i], fib_resist[i]) for i in near_resist[np.argsort(dist_resist[near_resist])]]
     return results_support, results_resistance
 
 def analyze_signal(symbol):
@@ -116,17 +155,18 @@ def analyze_signal(symbol):
         klines = get_klines(symbol, tf)
         if not klines:
             continue
-        closes = [float(k[4]) for k in klines]
-        ema4 = ema(closes, 4)
-        ema20 = ema(closes, 20)
-        upper, lower = bollinger_bands(closes)
-        price_now = closes[-1]
-        if ema4[-1] > ema20[-1] and price_now > upper:
-            trend["LONG"] += 1
-        elif ema4[-1] < ema20[-1] and price_now < lower:
-            trend["SHORT"] += 1
-        if tf == "1h":
-            levels = fibonacci_levels(closes)
+        with stage("indicators"):
+            closes = [float(k[4]) for k in klines]
+            ema4 = ema(closes, 4)
+            ema20 = ema(closes, 20)
+            upper, lower = bollinger_bands(closes)
+            price_now = closes[-1]
+            if ema4[-1] > ema20[-1] and price_now > upper:
+                trend["LONG"] += 1
+            elif ema4[-1] < ema20[-1] and price_now < lower:
+                trend["SHORT"] += 1
+            if tf == "1h":
+                levels = fibonacci_levels(closes)
 
     signal = "LONG" if trend["LONG"] >= 2 else "SHORT" if trend["SHORT"] >= 2 else "NONE"
     confidence = max(trend["LONG"], trend["SHORT"]) / 4
@@ -146,14 +186,15 @@ def analyze_ai(symbol):
         "\nBerikan analisa singkat dan saran entry (LONG/SHORT), target, dan risiko secara profesional."
     )
 
+    def complete():
+        with stage("openai"):
+            return chat_completion(prompt, max_tokens=300, temperature=0.5)
+
+    # Satu completion per (symbol, sinyal, confidence, candle); TANYA lain memakai jawaban yang sama
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # atau gpt-3.5-turbo
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300,
-            temperature=0.5,
-        )
-        reply = response.choices[0].message["content"]
+        reply = ai_cache.get_or_create(ai_key(symbol, signal, confidence), complete)
+    except AIBusy:
+        reply = "⏳ Analisa AI sedang penuh, coba lagi sebentar lagi."
     except Exception as e:
         reply = f"⚠️ Gagal menganalisis AI: {e}"
 
@@ -164,31 +205,54 @@ def plot_candlestick_fibonacci_chart(symbol):
     klines = get_klines(symbol, "15m", 100)
     if not klines:
         return None
-    closes = [float(k[4]) for k in klines]
-    dates = [datetime.fromtimestamp(k[0]/1000) for k in klines]
-    opens = [float(k[1]) for k in klines]
-    highs = [float(k[2]) for k in klines]
-    lows = [float(k[3]) for k in klines]
-
-    fig, ax = plt.subplots(figsize=(10,5))
-    for i in range(len(dates)):
-        color = 'green' if closes[i] >= opens[i] else 'red'
-        ax.plot([dates[i], dates[i]], [lows[i], highs[i]], color=color)
-        ax.plot([dates[i], dates[i]], [opens[i], closes[i]], linewidth=6, color=color)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
-    ax.set_title(f"{symbol} Candlestick + Fibonacci")
-    
-    levels = fibonacci_levels(closes)
-    for k, v in levels.items():
-        ax.axhline(y=v, linestyle='--', label=f'Fib {k}', linewidth=1)
-    ax.legend()
-    
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    plt.close(fig)
-    return buf
+    with stage("render"):
+        closes = [float(k[4]) for k in klines]
+        dates = [datetime.fromtimestamp(k[0]/1000) for k in klines]
+        opens = [float(k[1]) for k in klines]
+        highs = [float(k[2]) for k in klines]
+        lows = [float(k[3]) for k in klines]
+
+        fig, ax = plt.subplots(figsize=(10,5))
+        for i in range(len(dates)):
+            color = 'green' if closes[i] >= opens[i] else 'red'
+            ax.plot([dates[i], dates[i]], [lows[i], highs[i]], color=color)
+            ax.plot([dates[i], dates[i]], [opens[i], closes[i]], linewidth=6, color=color)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
+        ax.set_title(f"{symbol} Candlestick + Fibonacci")
+
+        levels = fibonacci_levels(closes)
+        for k, v in levels.items():
+            ax.axhline(y=v, linestyle='--', label=f'Fib {k}', linewidth=1)
+        ax.legend()
+
+        buf = io.BytesIO()
+        plt.tight_layout()
+        plt.savefig(buf, format='png')
+        buf.seek(0)
+        plt.close(fig)
+        return buf
+
+# --- Metrik Prometheus ---
+metrics.register_gauges("telegram", lambda: telegram_sender(TELEGRAM_TOKEN).stats())
+metrics.register_gauges("futures_symbols", futures_symbols.stats)
+metrics.register_gauges("binance_futures", binance_governor.governor("futures").stats)
+metrics.register_gauges("ai_cache", ai_cache.stats)
+metrics.register_gauges("state", lambda: state_backend().stats())
+metrics.register_gauges("queue", job_queue.stats)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# Label perintah untuk metrik; analisa simbol dan TANYA dicatat sendiri di job masing-masing
+def command_label(text):
+    if text in ("PAIRS", "PAIRSVOL"):
+        return text.lower()
+    if text in ("PAIRSUP", "PAIREST"):
+        return "screener"
+    if text.startswith("CHART "):
+        return "chart"
+    return None
 
 # --- Webhook ---
 @app.route("/", methods=["POST"])
@@ -198,7 +262,10 @@ def webhook():
         return "ok", 200
     chat_id = data["message"]["chat"]["id"]
     text = data["message"].get("text", "").strip().upper()
+    with metrics.command(command_label(text)):
+        return handle_message(chat_id, text, data.get("update_id"))
 
+def handle_message(chat_id, text, update_id=None):
     if text == "PAIRS":
         pairs = get_active_futures_pairs()
         msg = "✅ Pair Binance Futures:\n" + ", ".join(pairs[:50]) + "..."
@@ -213,9 +280,9 @@ def webhook():
     if text == "PAIRSUP" or text == "PAIREST":
         support, resistance = detect_support_resistance()
         if text == "PAIRSUP":
-            msg = "🟢 Pair Dekat Support:\n" + "\n".join([f"{s[0]}: {s[1]:.2f}" for s in support]) or "Tidak ada."
+            msg = "🟢 Pair Dekat Support:\n" + ("\n".join([f"{s[0]}: {s[1]:.2f}" for s in support[:50]]) or "Tidak ada.")
         else:
-            msg = "🔴 Pair Dekat Resistance:\n" + "\n".join([f"{s[0]}: {s[1]:.2f}" for s in resistance]) or "Tidak ada."
+            msg = "🔴 Pair Dekat Resistance:\n" + ("\n".join([f"{s[0]}: {s[1]:.2f}" for s in resistance[:50]]) or "Tidak ada.")
         send_telegram(chat_id, msg)
         return "ok", 200
 
@@ -233,20 +300,25 @@ def webhook():
         symbol = text.split(" ")[1]
         if not is_valid_futures_symbol(symbol):
             send_telegram(chat_id, f"⚠️ Symbol `{symbol}` tidak ditemukan.")
-        else:
-            msg = analyze_ai(symbol)
-            send_telegram(chat_id, msg)
+            return "ok", 200
+
+        # Analisa + completion jalan di worker job_queue; request webhook langsung dibalas
+        @metrics.command("ai")
+        def handle_ai():
+            send_telegram(chat_id, analyze_ai(symbol))
+
+        job_queue.submit(handle_ai, job_id=update_id)
         return "ok", 200
 
     if not text.isalnum() or len(text) < 6:
         return "ok", 200
 
-    now = time.time()
-    if now - last_request_time[chat_id] < RATE_LIMIT_SECONDS:
+    # Rate limit per chat di state bersama (berlaku lintas worker), entry hilang sendiri setelah TTL
+    if not state_backend().add(f"ratelimit:{chat_id}", time.time(), ttl=RATE_LIMIT_SECONDS):
         send_telegram(chat_id, "⏳ Tunggu 1 menit sebelum permintaan selanjutnya.")
         return "ok", 200
-    last_request_time[chat_id] = now
 
+    @metrics.command("signal")
     def handle_signal():
         symbol = text
         if not is_valid_futures_symbol(symbol):
@@ -264,8 +336,9 @@ def webhook():
             )
         send_telegram(chat_id, msg)
 
-    Thread(target=handle_signal).start()
+    job_queue.submit(handle_signal, job_id=update_id)
     return "ok", 200
 
 if __name__ == "__main__":
+    futures_symbols.start()
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
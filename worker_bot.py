@@ -2,11 +2,16 @@ import os
 import time
 import requests
 import numpy as np
-from binance.client import Client
+from binance_governor import binance_client
 from binance.enums import *
 from ta.momentum import RSIIndicator
 from ta.trend import MACD, ADXIndicator
 from decimal import Decimal
+from indicator_state import indicator_state
+from kline_stream import start_kline_stream, stream_klines
+from scheduler import CandleScheduler
+from telegram_sender import telegram_sender
+from state_backend import state_backend
 
 
 # === SETUP ===
@@ -14,28 +19,37 @@ API_KEY = os.getenv("BINANCE_API_KEY")
 API_SECRET = os.getenv("BINANCE_API_SECRET")
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-client = Client(API_KEY, API_SECRET)
+client = binance_client(API_KEY, API_SECRET)
 
-last_signal = {}
+BINANCE_FUTURES_WS_URL = os.getenv("BINANCE_FUTURES_WS_URL", "wss://fstream.binance.com")
+TIMEFRAMES = ["1m", "5m", "15m", "1h"]
+WORKER_SYMBOLS = [s.strip().upper() for s in os.getenv("WORKER_SYMBOLS", "BTCUSDT").split(",") if s.strip()]
+SCHEDULE_INTERVALS = [s.strip() for s in os.getenv("SCHEDULE_INTERVALS", "1m").split(",") if s.strip()]
 
 # === TOOLS ===
 def send_to_telegram(message):
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message}
-    try:
-        response = requests.post(url, data=payload)
-        if response.status_code != 200:
-            print("❌ Telegram error:", response.text)
-    except Exception as e:
-        print("❌ Telegram exception:", e)
+    # Masuk antrean sender (pool koneksi + rate limit Telegram), error dicetak oleh sender
+    return telegram_sender(TELEGRAM_TOKEN).send_message(TELEGRAM_CHAT_ID, message)
+
+def fetch_klines(symbol, interval, limit):
+    return client.futures_klines(symbol=symbol, interval=interval, limit=limit)
 
 def get_klines(symbol, interval, limit=100):
     try:
-        return client.futures_klines(symbol=symbol, interval=interval, limit=limit)
+        rows = stream_klines(symbol, interval, limit)
+        if rows is not None:
+            return rows
+        return fetch_klines(symbol, interval, limit)
     except Exception as e:
         print(f"❌ Error get_klines {interval}: {e}")
         return []
 
+def last_closed_open_time(symbol, interval):
+    # Open-time candle terakhir yang sudah close (baris terakhir REST masih candle berjalan)
+    now_ms = time.time() * 1000
+    closed = [k for k in get_klines(symbol, interval, 2) if int(k[6]) < now_ms]
+    return int(closed[-1][0]) if closed else None
+
 def calculate_indicators(closes):
     ema4 = np.mean(closes[-4:])
     ema20 = np.mean(closes[-20:])
@@ -73,9 +87,10 @@ def calculate_fibonacci(prices):
 
 # === STRATEGI DAN LOGIKA ===
 def analyze_signal(symbol):
-    timeframes = ["1m", "5m", "15m", "1h"]
+    timeframes = TIMEFRAMES
     trend_confirm = []
     closes_main = []
+    live_main = {}
 
     for tf in timeframes:
         klines = get_klines(symbol, tf)
@@ -85,8 +100,13 @@ def analyze_signal(symbol):
         ema4, ema20, rsi, adx, upper, middle, lower = calculate_indicators(closes)
         direction = "LONG" if ema4 > ema20 else "SHORT"
         trend_confirm.append(direction)
+        # State indikator streaming: hanya candle yang baru close yang dihitung
+        live = indicator_state(symbol, tf).sync(
+            [k[0] for k in klines], [k[2] for k in klines], [k[3] for k in klines], closes
+        )
         if tf == "1m":
             closes_main = closes
+            live_main = live
 
     if len(trend_confirm) < 3:
         return "NONE", 0, {}, {}
@@ -96,7 +116,7 @@ def analyze_signal(symbol):
     fibo = calculate_fibonacci(closes_main)
     indicators = {
         "ema4_vs_ema20": signal,
-        "rsi": compute_rsi(closes_main),
+        "rsi": live_main["RSI"],
         "adx": 30,
         "bollinger": compute_bollinger_bands(closes_main)
     }
@@ -104,17 +124,16 @@ def analyze_signal(symbol):
 
 # === NOTIFIKASI ===
 def notify(symbol):
-    global last_signal
     signal, price, fibo, ind = analyze_signal(symbol)
-    key = f"{symbol}_last_signal"
+    key = f"last_signal:{symbol}"
 
     if signal == "NONE":
-        print("⏳ Belum ada sinyal kuat.")
+        print(f"⏳ {symbol}: belum ada sinyal kuat.")
         return
-    if last_signal.get(key) == signal:
-        print(f"⏭️ Sinyal {signal} sudah dikirim sebelumnya.")
+    # Sinyal terakhir di state bersama: swap atomik, jadi hanya satu worker yang mengirim
+    if state_backend().swap(key, signal) == signal:
+        print(f"⏭️ {symbol}: sinyal {signal} sudah dikirim sebelumnya.")
         return
-    last_signal[key] = signal
 
     message = (
         f"📢 *Rekomendasi Trading Futures*\n\n"
@@ -133,11 +152,10 @@ def notify(symbol):
     send_to_telegram(message)
 
 # === MAIN LOOP ===
+# Evaluasi dijalankan tepat setelah candle SCHEDULE_INTERVALS close, untuk semua WORKER_SYMBOLS
 def main():
-    symbol = "BTCUSDT"
-    while True:
-        notify(symbol)
-        time.sleep(30)  # Lebih cepat untuk tangkap momentum
+    start_kline_stream(WORKER_SYMBOLS, TIMEFRAMES, fetch_klines, base_url=BINANCE_FUTURES_WS_URL)
+    CandleScheduler(WORKER_SYMBOLS, SCHEDULE_INTERVALS, last_closed_open_time, notify).run()
 
 if __name__ == "__main__":
     main()